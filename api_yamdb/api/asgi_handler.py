@@ -0,0 +1,184 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+
+from api.concurrency import EVENT_LOOP_KEY
+
+# Сколько частей ответа может ждать отправки клиенту
+STREAM_BUFFER = 8
+# Как часто поток, ожидающий места в очереди, проверяет отключение клиента
+PUT_WAIT_SECONDS = 0.5
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASGI_THREADS, thread_name_prefix='asgi'
+)
+
+
+def build_environ(scope, body):
+    host, port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': host,
+        'SERVER_PORT': str(port),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': BytesIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+def start_message(started):
+    return {
+        'type': 'http.response.start',
+        'status': started['status'],
+        'headers': [
+            (name.encode('latin-1'), value.encode('latin-1'))
+            for name, value in started['headers']
+        ],
+    }
+
+
+def run_wsgi(wsgi_application, environ, put):
+    # Выполняется в потоке пула целиком, поэтому итерация по ответу идёт
+    # в том же потоке и с тем же соединением с базой, что и представление.
+    # put передаёт сообщения ASGI в цикл событий по одному.
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    result = wsgi_application(environ, start_response)
+    try:
+        sent_start = False
+        for chunk in result:
+            if not chunk:
+                continue
+            if not sent_start:
+                put(start_message(started))
+                sent_start = True
+            put({'type': 'http.response.body', 'body': chunk,
+                 'more_body': True})
+        if not sent_start:
+            put(start_message(started))
+        put({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+
+
+class ResponseAborted(Exception):
+    pass
+
+
+def put_message(loop, messages, aborted, message):
+    # Вызывается из потока. Ожидание места в очереди прерывается, если
+    # клиент отключился и сообщения больше никто не заберёт.
+    future = asyncio.run_coroutine_threadsafe(messages.put(message), loop)
+    while True:
+        if aborted.is_set():
+            future.cancel()
+            raise ResponseAborted
+        try:
+            return future.result(timeout=PUT_WAIT_SECONDS)
+        except TimeoutError:
+            pass
+
+
+async def drain(messages, task):
+    while not messages.empty():
+        messages.get_nowait()
+    await asyncio.wait((task,))
+    if not task.cancelled():
+        task.exception()
+
+
+class ASGIHandler:
+    # В Django 2.2 нет ASGI-обработчика. Каждый запрос проходит весь стек
+    # Django — middleware, аутентификацию DRF, кеш ответов и ETag — в
+    # WSGI-обработчике в пуле из ASGI_THREADS потоков, а цикл событий
+    # тем временем принимает другие соединения. Независимые запросы к базе
+    # одного ответа (COUNT и страница, жанры произведений) представления
+    # выполняют одновременно через этот же цикл (api.concurrency). Тело
+    # ответа отправляется частями по мере готовности, StreamingHttpResponse
+    # не копится в памяти.
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+        await self.call_wsgi(build_environ(scope, body), send)
+
+    async def call_wsgi(self, environ, send):
+        loop = asyncio.get_running_loop()
+        # Через цикл событий представления выполняют независимые запросы
+        # к базе одновременно (api.concurrency.run_concurrently).
+        environ[EVENT_LOOP_KEY] = loop
+        # Поток ждёт, пока в очереди освободится место: если клиент читает
+        # медленно, ответ не накапливается в памяти.
+        messages = asyncio.Queue(STREAM_BUFFER)
+        aborted = threading.Event()
+        task = loop.run_in_executor(
+            executor, run_wsgi, self.wsgi_application, environ,
+            partial(put_message, loop, messages, aborted)
+        )
+        getter = None
+        try:
+            while True:
+                getter = loop.create_task(messages.get())
+                await asyncio.wait(
+                    (getter, task), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not getter.done():
+                    break
+                await send(getter.result())
+            while not messages.empty():
+                await send(messages.get_nowait())
+        except BaseException:
+            # Клиент отключился: поток прервёт ответ на следующей части.
+            # Ответ дожидается потока, чтобы тот закрыл ответ и вернул
+            # соединение с базой до завершения запроса.
+            aborted.set()
+            await drain(messages, task)
+            raise
+        finally:
+            if getter is not None and not getter.done():
+                getter.cancel()
+        await task
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,101 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.metrics import record_authentication
+from reviews.models import User, UserRole
+
+ROLE_CLAIMS = ('role', 'is_staff', 'is_superuser')
+USER_CLAIMS = ('username', *ROLE_CLAIMS)
+# Изменение любого из этих полей отзывает выданные токены. is_active не
+# передаётся в claims: после блокировки токен проверяется по базе, и
+# неактивный пользователь получает 401.
+TOKEN_VERSION_FIELDS = (*USER_CLAIMS, 'is_active')
+TOKEN_VERSION_KEY = 'auth:token_version:{}'
+
+
+def remember_token_version(user_id, version):
+    cache.set(
+        TOKEN_VERSION_KEY.format(user_id), version,
+        settings.TOKEN_VERSION_CACHE_TIMEOUT
+    )
+
+
+def forget_token_version(user_id):
+    cache.delete(TOKEN_VERSION_KEY.format(user_id))
+
+
+def get_token_version(user_id, cached=True):
+    # Источник истины — база. Кеш только сокращает число запросов для
+    # чтения, и если версию вытеснили, она снова читается из базы.
+    version = cache.get(TOKEN_VERSION_KEY.format(user_id)) if cached else None
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list(
+            'token_version', flat=True
+        ).first()
+        if version is not None:
+            remember_token_version(user_id, version)
+    return version
+
+
+def get_access_token(user):
+    token = RefreshToken.for_user(user).access_token
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    token['token_version'] = user.token_version
+    remember_token_version(user.pk, user.token_version)
+    return token
+
+
+class RoleTokenUser(TokenUser):
+    @property
+    def role(self):
+        return self.token['role']
+
+    @property
+    def is_admin(self):
+        return (
+            self.role == UserRole.ADMIN
+            or self.is_staff
+            or self.is_superuser
+        )
+
+    @property
+    def is_moderator(self):
+        return self.role == UserRole.MODERATOR
+
+
+class RoleTokenAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        # Источник пользователя (claims или база) попадает в метрики,
+        # чтобы было видно, во что обходятся запросы без claims.
+        self.source = 'anonymous'
+        self.safe_request = request.method in SAFE_METHODS
+        start = time.perf_counter()
+        try:
+            return super().authenticate(request)
+        except AuthenticationFailed:
+            self.source = 'failed'
+            raise
+        finally:
+            record_authentication(self.source, time.perf_counter() - start)
+
+    def get_user(self, validated_token):
+        self.source = 'database'
+        if not all(
+            claim in validated_token
+            for claim in (*USER_CLAIMS, 'token_version')
+        ):
+            return super().get_user(validated_token)
+        user = RoleTokenUser(validated_token)
+        version = get_token_version(user.id, cached=self.safe_request)
+        if version != validated_token['token_version']:
+            return super().get_user(validated_token)
+        self.source = 'claims'
+        return user
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from reviews.models import User
+
+
+def item_error(index, errors):
+    return {'index': index, 'errors': errors}
+
+
+class BulkCreateMixin:
+    # Пакетная загрузка для импорта: элементы проверяются по отдельности,
+    # а прошедшие проверку сохраняются одной вставкой. Администратор может
+    # указать автора элемента по username.
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request, **kwargs):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError('Ожидается непустой список объектов')
+        if len(items) > settings.BULK_CREATE_MAX_ITEMS:
+            raise ValidationError(
+                f'Не больше {settings.BULK_CREATE_MAX_ITEMS} объектов '
+                'за запрос'
+            )
+        authors = self.get_bulk_authors(items)
+        objects, errors = [], []
+        for index, item in enumerate(items):
+            obj, error = self.build_bulk_object(item, authors)
+            if error is None:
+                objects.append((index, obj))
+            else:
+                errors.append(item_error(index, error))
+        objects, conflicts = self.exclude_bulk_conflicts(objects)
+        errors = sorted(errors + conflicts, key=lambda error: error['index'])
+        if objects:
+            try:
+                with transaction.atomic():
+                    self.perform_bulk_create([obj for _, obj in objects])
+            except IntegrityError:
+                raise ValidationError(
+                    'Пакет конфликтует с сохранёнными данными, '
+                    'повторите запрос'
+                )
+        return Response(
+            {'created': len(objects), 'errors': errors},
+            status=(
+                status.HTTP_201_CREATED if objects
+                else status.HTTP_400_BAD_REQUEST
+            )
+        )
+
+    def get_bulk_authors(self, items):
+        usernames = {
+            item['author'] for item in items
+            if isinstance(item, dict) and 'author' in item
+        }
+        if not usernames:
+            return {}
+        return dict(
+            User.objects.filter(
+                username__in=usernames
+            ).values_list('username', 'id')
+        )
+
+    def build_bulk_object(self, item, authors):
+        serializer = self.get_serializer(data=item)
+        if not serializer.is_valid():
+            return None, serializer.errors
+        author_id = self.request.user.id
+        if 'author' in item:
+            if not self.request.user.is_admin:
+                return None, {
+                    'author': ['Указать автора может только администратор']
+                }
+            author_id = authors.get(item['author'])
+            if author_id is None:
+                return None, {'author': ['Пользователь не найден']}
+        return serializer.Meta.model(
+            **serializer.validated_data,
+            **self.get_bulk_kwargs(),
+            author_id=author_id
+        ), None
+
+    def exclude_bulk_conflicts(self, objects):
+        return objects, []
+
+    def get_bulk_kwargs(self):
+        return {}
+
+    def perform_bulk_create(self, objects):
+        # bulk_create не отправляет сигналы: наследники дополняют этот
+        # метод обновлением счётчиков и сбросом кеша.
+        self.get_serializer_class().Meta.model.objects.bulk_create(objects)
@@ -0,0 +1,134 @@
+import time
+from datetime import timedelta
+from functools import partial
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from api.metrics import record_cache
+from api_yamdb.routers import (PRIMARY, reading_from_replica,
+                               replica_reads_active)
+from reviews.models import GLOBAL_CACHE_SCOPE, CacheVersion
+
+RESPONSE_KEY = 'api:response:{}'
+
+
+def get_versions(scopes):
+    scopes = [*scopes, GLOBAL_CACHE_SCOPE]
+    rows = {
+        scope: (version, changed_at)
+        for scope, version, changed_at in CacheVersion.objects.using(
+            PRIMARY
+        ).filter(scope__in=scopes).values_list(
+            'scope', 'version', 'changed_at'
+        )
+    }
+    versions = [f'{scope}:{rows.get(scope, (0,))[0]}' for scope in scopes]
+    changed_at = max(
+        (changed_at for _, changed_at in rows.values()), default=None
+    )
+    return versions, changed_at
+
+
+def get_last_modified(changed_at):
+    # Last-Modified точен до секунды. Пока не закончилась секунда
+    # последнего изменения, следующее изменение получит ту же дату, и
+    # If-Modified-Since вернул бы устаревший 304, поэтому остаётся ETag.
+    if changed_at is None:
+        return None
+    last_modified = int(changed_at.timestamp())
+    if last_modified >= int(time.time()):
+        return None
+    return last_modified
+
+
+def replica_may_lag(changed_at):
+    # Реплика может ещё не получить изменение моложе REPLICA_STICKY_SECONDS,
+    # и собранный с неё ответ нельзя кешировать или помечать ETag новой
+    # версии: устаревшие данные закрепились бы под ней. Поэтому ответ,
+    # который попадёт в кеш, собирается по основной базе — один раз на
+    # версию, остальные получают его из кеша. Ответ с токеном не кешируется:
+    # он читается с реплики, но уходит без ETag и Last-Modified.
+    return (
+        changed_at is not None
+        and replica_reads_active()
+        and timezone.now() - changed_at < timedelta(
+            seconds=settings.REPLICA_STICKY_SECONDS
+        )
+    )
+
+
+def invalidate(*scopes):
+    # Новая версия делает недоступными все ответы, собранные на старой,
+    # поэтому перебирать и удалять ключи ответов не нужно. Строку 'titles'
+    # меняет каждый отзыв: внутри транзакции её блокировка держалась бы до
+    # коммита и выстраивала бы все записи в очередь. После коммита строка
+    # блокируется только на время UPDATE, а ответ, собранный из новых
+    # данных под старой версией, заменится после увеличения версии.
+    transaction.on_commit(partial(CacheVersion.objects.bump, *scopes))
+
+
+class CachedListMixin:
+    cache_scope = None
+
+    def get_cache_scopes(self):
+        return (self.cache_scope,)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        versions, changed_at = get_versions(self.get_cache_scopes())
+        self.replica_may_lag = replica_may_lag(changed_at)
+        digest = md5(
+            '|'.join([request.get_full_path(), *versions]).encode()
+        ).hexdigest()
+        etag = quote_etag(digest)
+        last_modified = get_last_modified(changed_at)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            record_cache(type(self).__name__, 'not_modified')
+        else:
+            response = self.get_response(
+                handler, RESPONSE_KEY.format(digest), request, *args, **kwargs
+            )
+        if response.status_code in (200, 304) and not (
+            self.replica_may_lag and request.user.is_authenticated
+        ):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get_response(self, handler, key, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        data = cache.get(key)
+        if data is not None:
+            record_cache(type(self).__name__, 'hit')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        record_cache(type(self).__name__, 'miss')
+        if self.replica_may_lag:
+            reading_from_replica.set(False)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedResponseMixin(CachedListMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
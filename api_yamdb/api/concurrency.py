@@ -0,0 +1,62 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from contextvars import copy_context
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+# Под этим ключом ASGIHandler кладёт в environ свой цикл событий
+EVENT_LOOP_KEY = 'api_yamdb.event_loop'
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASGI_QUERY_THREADS, thread_name_prefix='asgi-query'
+)
+
+
+def get_event_loop(request):
+    return request.META.get(EVENT_LOOP_KEY)
+
+
+def in_query_thread(context, wrappers, function):
+    # Поток пула получает контекст запроса (чтение с реплики) и обёртки
+    # execute_wrapper (метрики, профилирование). request_started и
+    # request_finished в нём не срабатывают, поэтому устаревшие
+    # соединения закрываются здесь.
+    close_old_connections()
+    with ExitStack() as stack:
+        for alias, alias_wrappers in wrappers.items():
+            for wrapper in alias_wrappers:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(wrapper)
+                )
+        return context.run(function)
+
+
+async def gather_queries(calls):
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(
+        *(loop.run_in_executor(executor, call) for call in calls)
+    )
+
+
+def run_concurrently(request, *functions):
+    # Независимые запросы к базе одного ответа. Под ASGI они выполняются
+    # одновременно в пуле из ASGI_QUERY_THREADS потоков, под WSGI — по
+    # очереди в потоке запроса. Пул отдельный от потоков запросов, иначе
+    # запросы, ждущие свои выборки, могли бы занять его целиком.
+    loop = get_event_loop(request)
+    if loop is None or len(functions) < 2:
+        return [function() for function in functions]
+    wrappers = {
+        connection.alias: list(connection.execute_wrappers)
+        for connection in connections.all()
+    }
+    calls = [
+        partial(in_query_thread, copy_context(), wrappers, function)
+        for function in functions
+    ]
+    return asyncio.run_coroutine_threadsafe(
+        gather_queries(calls), loop
+    ).result()
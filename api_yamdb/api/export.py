@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from api.permissions import UserIsAdmin
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+
+def iterate_chunks(queryset, size):
+    chunk = []
+    for obj in queryset.iterator(chunk_size=size):
+        chunk.append(obj)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_ndjson(items):
+    renderer = JSONRenderer()
+    for item in items:
+        yield renderer.render(item) + b'\n'
+
+
+def render_json_array(items):
+    renderer = JSONRenderer()
+    separator = b'['
+    for item in items:
+        yield separator + renderer.render(item)
+        separator = b','
+    yield b']' if separator == b',' else b'[]'
+
+
+class StreamingExportMixin:
+    # Полная выгрузка без пагинации: строки читаются iterator() порциями
+    # по EXPORT_CHUNK_SIZE и сразу отдаются клиенту, поэтому память не
+    # растёт с размером выгрузки. ?output=ndjson (по умолчанию) или json.
+    @action(detail=False, methods=['get'], url_path='export',
+            permission_classes=(UserIsAdmin,))
+    def export(self, request, **kwargs):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in CONTENT_TYPES:
+            raise ValidationError(
+                f'output: ожидается одно из {", ".join(CONTENT_TYPES)}'
+            )
+        serializer = self.get_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        # iterator() не выполняет prefetch_related, связи многие-ко-многим
+        # подгружаются через prepare_export_chunk одним запросом на порцию.
+        chunks = iterate_chunks(
+            queryset.prefetch_related(None), settings.EXPORT_CHUNK_SIZE
+        )
+        items = (
+            serializer.to_representation(obj)
+            for chunk in chunks
+            for obj in self.prepare_export_chunk(chunk, serializer)
+        )
+        render = render_ndjson if output == 'ndjson' else render_json_array
+        return StreamingHttpResponse(
+            render(items), content_type=CONTENT_TYPES[output]
+        )
+
+    def prepare_export_chunk(self, chunk, serializer):
+        return chunk
@@ -1,14 +1,86 @@
 import django_filters as filters
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Value, When
 
-from reviews.models import Title
+from reviews.models import GenreTitle, Title
+from reviews.search import search_titles
+
+
+def titles_with_genres(slugs):
+    return GenreTitle.objects.filter(
+        genre__slug__in=slugs
+    ).values('title_id')
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    # id в конце делает порядок однозначным для пагинации; направление
+    # совпадает с последним полем, чтобы подходил индекс (поле, id).
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        ordering = [self.get_ordering_value(param) for param in value]
+        tie_breaker = '-pk' if ordering[-1].startswith('-') else 'pk'
+        return qs.order_by(
+            *(self.order_nulls(qs, field) for field in ordering), tie_breaker
+        )
+
+    def order_nulls(self, qs, field):
+        # Пустое значение (произведение без оценок) считается наименьшим,
+        # как в SQLite. PostgreSQL ставит NULL выше любых значений, поэтому
+        # там порядок NULL задаётся явно, а title_rating_idx построен с
+        # NULLS FIRST (миграция 0015).
+        name = field.lstrip('-')
+        if (
+            connections[qs.db].vendor != 'postgresql'
+            or not qs.model._meta.get_field(name).null
+        ):
+            return field
+        if field.startswith('-'):
+            return F(name).desc(nulls_last=True)
+        return F(name).asc(nulls_first=True)
 
 
 class TitleFilter(filters.FilterSet):
-    genre = filters.CharFilter(field_name='genre__slug')
+    # Жанры через запятую: genre — любой из них, genre_all — все сразу.
+    # Полусоединение pk IN (...) по индексу (genre, title) не размножает
+    # строки и не требует DISTINCT или GROUP BY.
+    genre = filters.CharFilter(method='filter_genre')
+    genre_all = filters.CharFilter(method='filter_genre_all')
     category = filters.CharFilter(field_name='category__slug')
     year = filters.NumberFilter(field_name='year')
-    name = filters.CharFilter(field_name='name', lookup_expr='contains')
+    name = filters.CharFilter(method='filter_name')
+    ordering = StableOrderingFilter(fields=(
+        ('rating', 'rating'),
+        ('review_count', 'reviews'),
+        ('year', 'year'),
+        ('name', 'name'),
+    ))
 
     class Meta:
         model = Title
         fields = '__all__'
+
+    @staticmethod
+    def split(value):
+        return [slug for slug in value.split(',') if slug]
+
+    def filter_genre(self, queryset, name, value):
+        return queryset.filter(
+            pk__in=titles_with_genres(self.split(value))
+        )
+
+    def filter_genre_all(self, queryset, name, value):
+        for slug in self.split(value):
+            queryset = queryset.filter(pk__in=titles_with_genres([slug]))
+        return queryset
+
+    def filter_name(self, queryset, name, value):
+        ids = search_titles(value)
+        if ids is None:
+            return queryset
+        # Сохраняем порядок релевантности из поискового индекса
+        return queryset.filter(pk__in=ids).order_by(Case(
+            *[When(pk=pk, then=Value(position))
+              for position, pk in enumerate(ids)],
+            output_field=IntegerField()
+        ))
@@ -0,0 +1,234 @@
+import glob
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+FAMILIES = {
+    'api_requests_total': (
+        'counter', 'Запросы к API по представлениям и действиям'
+    ),
+    'api_request_duration_seconds': (
+        'histogram', 'Время обработки запроса'
+    ),
+    'api_response_size_bytes': ('histogram', 'Размер тела ответа'),
+    'api_db_queries_total': ('counter', 'Запросы к базе данных'),
+    'api_db_duration_seconds_total': (
+        'counter', 'Суммарное время запросов к базе данных'
+    ),
+    'api_authentication_duration_seconds': (
+        'histogram', 'Время аутентификации по источнику пользователя'
+    ),
+    'api_cache_requests_total': ('counter', 'Обращения к кешу ответов'),
+}
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+AUTH_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05)
+
+HEADER = struct.Struct('i')
+LENGTH = struct.Struct('i')
+VALUE = struct.Struct('d')
+
+
+def read_entries(data, used):
+    position = HEADER.size
+    while position < used:
+        length, = LENGTH.unpack_from(data, position)
+        position += LENGTH.size
+        key = bytes(data[position:position + length]).decode()
+        position += length + (-(position + length) % 8)
+        yield key, VALUE.unpack_from(data, position)[0], position
+        position += VALUE.size
+
+
+class FileStore:
+    # Каждый процесс пишет только в свой файл, поэтому между воркерами
+    # блокировки не нужны. Запись новой метрики завершается обновлением
+    # заголовка, так что читатели видят только целые записи.
+    initial_size = 64 * 1024
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def open(self):
+        self.pid = os.getpid()
+        path = os.path.join(self.directory, f'metrics_{self.pid}.db')
+        self.file = open(path, 'a+b')
+        if os.fstat(self.file.fileno()).st_size == 0:
+            self.file.truncate(self.initial_size)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.used = HEADER.unpack_from(self.map, 0)[0] or HEADER.size
+        self.positions = {
+            key: position
+            for key, _, position in read_entries(self.map, self.used)
+        }
+
+    def add(self, key):
+        encoded = key.encode()
+        position = self.used + LENGTH.size
+        value_position = position + len(encoded) + (
+            -(position + len(encoded)) % 8
+        )
+        used = value_position + VALUE.size
+        while used > len(self.map):
+            size = len(self.map) * 2
+            self.map.close()
+            self.file.truncate(size)
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        LENGTH.pack_into(self.map, self.used, len(encoded))
+        self.map[position:position + len(encoded)] = encoded
+        VALUE.pack_into(self.map, value_position, 0.0)
+        HEADER.pack_into(self.map, 0, used)
+        self.used = used
+        self.positions[key] = value_position
+        return value_position
+
+    def inc(self, key, amount=1):
+        with self.lock:
+            # После fork воркер получает собственный файл
+            if self.pid != os.getpid():
+                self.open()
+            position = self.positions.get(key)
+            if position is None:
+                position = self.add(key)
+            value, = VALUE.unpack_from(self.map, position)
+            VALUE.pack_into(self.map, position, value + amount)
+
+    def collect(self):
+        values = defaultdict(float)
+        pattern = os.path.join(self.directory, 'metrics_*.db')
+        for path in glob.glob(pattern):
+            with open(path, 'rb') as file:
+                data = file.read()
+            if len(data) < HEADER.size:
+                continue
+            used = HEADER.unpack_from(data, 0)[0]
+            for key, value, _ in read_entries(data, used):
+                values[key] += value
+        return values
+
+
+class MemoryStore:
+    # Без METRICS_DIR метрики видны только в текущем процессе
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = defaultdict(float)
+
+    def inc(self, key, amount=1):
+        with self.lock:
+            self.values[key] += amount
+
+    def collect(self):
+        with self.lock:
+            return dict(self.values)
+
+
+stores = {}
+
+
+def get_store():
+    directory = settings.METRICS_DIR
+    if directory not in stores:
+        stores[directory] = (
+            FileStore(directory) if directory else MemoryStore()
+        )
+    return stores[directory]
+
+
+def escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('"', r'\"')
+        .replace('\n', r'\n')
+    )
+
+
+def sample(name, labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(
+        f'{label}="{escape(value)}"' for label, value in labels.items()
+    ) + '}'
+
+
+def inc(name, labels, amount=1):
+    get_store().inc(sample(name, labels), amount)
+
+
+def observe(name, labels, value, buckets):
+    store = get_store()
+    # Корзины создаются все сразу: Prometheus ждёт полный набор границ
+    for bound in buckets:
+        store.inc(
+            sample(f'{name}_bucket', {**labels, 'le': bound}),
+            int(value <= bound)
+        )
+    store.inc(sample(f'{name}_bucket', {**labels, 'le': '+Inf'}))
+    store.inc(sample(f'{name}_sum', labels), value)
+    store.inc(sample(f'{name}_count', labels))
+
+
+def record_request(labels, status, duration, size, queries, db_duration):
+    inc('api_requests_total', {**labels, 'status': status})
+    observe('api_request_duration_seconds', labels, duration,
+            DURATION_BUCKETS)
+    if size is not None:
+        observe('api_response_size_bytes', labels, size, SIZE_BUCKETS)
+    inc('api_db_queries_total', labels, queries)
+    inc('api_db_duration_seconds_total', labels, db_duration)
+
+
+def record_authentication(source, duration):
+    observe('api_authentication_duration_seconds', {'source': source},
+            duration, AUTH_BUCKETS)
+
+
+def record_cache(viewset, result):
+    inc('api_cache_requests_total', {'viewset': viewset, 'result': result})
+
+
+def get_family(key):
+    name = key.split('{', 1)[0]
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+            return name[:-len(suffix)]
+    return name
+
+
+def sort_key(key):
+    # Корзины гистограммы идут по возрастанию границы, +Inf последней
+    if 'le="' not in key:
+        return key, 0
+    head, tail = key.split('le="', 1)
+    bound, rest = tail.split('"', 1)
+    return head + rest, float(bound.replace('+Inf', 'inf'))
+
+
+def render():
+    families = defaultdict(list)
+    for key, value in get_store().collect().items():
+        families[get_family(key)].append((key, value))
+    lines = []
+    for family in sorted(families):
+        kind, description = FAMILIES.get(family, ('untyped', ''))
+        lines.append(f'# HELP {family} {description}')
+        lines.append(f'# TYPE {family} {kind}')
+        for key, value in sorted(families[family],
+                                 key=lambda item: sort_key(item[0])):
+            lines.append(f'{key} {value!r}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    # Метрики раскрывают маршруты и нагрузку, поэтому отдаются только
+    # адресам из METRICS_ALLOWED_IPS, например сборщику Prometheus.
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
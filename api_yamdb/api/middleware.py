@@ -0,0 +1,219 @@
+import logging
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+from datetime import timedelta
+from hashlib import md5
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import Serializer
+
+from api import metrics
+from api_yamdb.routers import PRIMARY, reading_from_replica
+from reviews.models import PrimaryPin
+
+logger = logging.getLogger(__name__)
+
+# Значения в SQL заменяются, чтобы одинаковые запросы совпадали по форме
+SQL_LIST = re.compile(r'\(\s*%s(\s*,\s*%s)*\s*\)')
+SQL_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+PRIMARY_COOKIE = 'use_primary'
+
+
+def get_client_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if authorization:
+        return md5(authorization.encode()).hexdigest()
+    return None
+
+
+class ReplicaMiddleware:
+    # Безопасные запросы к представлениям с replica_reads читают с реплик.
+    # После записи клиент какое-то время читает с основной базы, чтобы
+    # видеть свои изменения, даже если реплика отстаёт: браузер — по
+    # cookie, клиент с токеном — по отметке PrimaryPin в основной базе.
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            token = getattr(request, 'replica_token', None)
+            if token is not None:
+                reading_from_replica.reset(token)
+        if (
+            settings.REPLICA_DATABASES
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            self.stick_to_primary(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if (
+            settings.REPLICA_DATABASES
+            and request.method in SAFE_METHODS
+            and getattr(view_class, 'replica_reads', False)
+            and not self.is_sticky(request)
+        ):
+            request.replica_token = reading_from_replica.set(True)
+
+    def is_sticky(self, request):
+        if PRIMARY_COOKIE in request.COOKIES:
+            return True
+        key = get_client_key(request)
+        return key is not None and PrimaryPin.objects.using(
+            PRIMARY
+        ).is_pinned(key)
+
+    def stick_to_primary(self, request, response):
+        response.set_cookie(
+            PRIMARY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS
+        )
+        key = get_client_key(request)
+        if key is not None:
+            PrimaryPin.objects.pin(key, timezone.now() + timedelta(
+                seconds=settings.REPLICA_STICKY_SECONDS
+            ))
+
+
+def normalize_sql(sql):
+    return SQL_LITERAL.sub('?', SQL_LIST.sub('(...)', sql))
+
+
+def find_serializer_field():
+    # Ищем ближайший Serializer.to_representation, который сейчас
+    # заполняет поле: именно это поле и порождает запрос.
+    frame = sys._getframe(2)
+    while frame is not None:
+        serializer = frame.f_locals.get('self')
+        if (
+            frame.f_code.co_name == 'to_representation'
+            and isinstance(serializer, Serializer)
+            and 'field' in frame.f_locals
+        ):
+            field = frame.f_locals['field']
+            return f'{type(serializer).__name__}.{field.field_name}'
+        frame = frame.f_back
+    return None
+
+
+class QueryProfile:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.fields = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            shape = normalize_sql(sql)
+            self.shapes[shape] += 1
+            if shape not in self.fields:
+                self.fields[shape] = find_serializer_field()
+
+
+def get_view_labels(request):
+    # viewset и action берутся из маршрута: у представлений DRF
+    # as_view() сохраняет класс и соответствие методов действиям.
+    view = getattr(request.resolver_match, 'func', None)
+    if view is None:
+        return {'viewset': 'unresolved', 'action': request.method.lower()}
+    view_class = getattr(view, 'cls', None)
+    actions = getattr(view, 'actions', None) or {}
+    return {
+        'viewset': getattr(view_class, '__name__', view.__name__),
+        'action': actions.get(
+            request.method.lower(), request.method.lower()
+        ),
+    }
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        metrics.record_request(
+            get_view_labels(request),
+            status=response.status_code,
+            duration=time.perf_counter() - start,
+            size=None if response.streaming else len(response.content),
+            queries=counter.count,
+            db_duration=counter.duration,
+        )
+        return response
+
+
+class QueryProfilingMiddleware:
+    # Включается QUERY_PROFILING: считает запросы к базе и их время,
+    # отдаёт их в заголовках и предупреждает о повторах вида N+1.
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = QueryProfile()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+        response['X-Query-Count'] = str(profile.count)
+        response['Server-Timing'] = (
+            f'db;dur={profile.duration * 1000:.1f};'
+            f'desc="{profile.count} queries", '
+            f'total;dur={total * 1000:.1f}'
+        )
+        self.report_duplicates(request, profile)
+        return response
+
+    def report_duplicates(self, request, profile):
+        threshold = settings.QUERY_PROFILING_DUPLICATE_THRESHOLD
+        view = getattr(request.resolver_match, 'func', None)
+        view_name = getattr(getattr(view, 'cls', None), '__name__', None)
+        for shape, count in profile.shapes.items():
+            if count > threshold:
+                logger.warning(
+                    'Похоже на N+1: %s %s выполнил %d одинаковых запросов '
+                    '(%s, поле %s): %s',
+                    request.method, request.path, count,
+                    view_name or 'представление не найдено',
+                    profile.fields[shape] or 'не найдено', shape
+                )
@@ -0,0 +1,64 @@
+from functools import partial
+
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+from api.concurrency import get_event_loop, run_concurrently
+
+
+class ConcurrentLimitOffsetPagination(LimitOffsetPagination):
+    # Под ASGI COUNT и выборка страницы идут одновременно. Представление
+    # может разбить страницу на несколько запросов через get_page_queries
+    # и собрать её в build_page. Под WSGI всё как в LimitOffsetPagination.
+    def paginate_queryset(self, queryset, request, view=None):
+        if get_event_loop(request) is None:
+            return super().paginate_queryset(queryset, request, view)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        page = slice(self.offset, self.offset + self.limit)
+        queries = getattr(view, 'get_page_queries', self.get_page_queries)
+        self.count, *results = run_concurrently(
+            request, partial(self.get_count, queryset),
+            *queries(queryset, page)
+        )
+        rows = getattr(view, 'build_page', self.build_page)(*results)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return rows
+
+    def get_page_queries(self, queryset, page):
+        return (partial(list, queryset[page]),)
+
+    def build_page(self, rows):
+        return rows
+
+
+class FeedCursorPagination(CursorPagination):
+    ordering = ('pub_date', 'id')
+    page_size_query_param = 'limit'
+
+
+class FeedPagination(ConcurrentLimitOffsetPagination):
+    # По умолчанию limit/offset, курсорная пагинация включается
+    # параметром ?pagination=cursor и не зависит от глубины страницы.
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_pagination_class = FeedCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if request.query_params.get(self.mode_query_param) == self.cursor_mode:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,11 +1,35 @@
 import datetime as dt
 from uuid import uuid4
 
-from django.core.exceptions import ValidationError
-from django.shortcuts import get_object_or_404
+from django.db.models import Q
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 
-from reviews.models import ROLES, Category, Comment, Genre, Review, Title, User
+from reviews.models import (ROLES, Category, Comment, Genre, Review, Title,
+                            TitleRanking, User)
+
+
+def parse_field_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    # ?fields=id,name оставляет в ответе только перечисленные поля,
+    # ?omit=description убирает перечисленные. Вложенные сериализаторы
+    # и запросы на запись параметры не затрагивают.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        params = request.query_params
+        names = set(self.fields)
+        if 'fields' in params:
+            names &= parse_field_names(params['fields'])
+        if 'omit' in params:
+            names -= parse_field_names(params['omit'])
+        for name in set(self.fields) - names:
+            self.fields.pop(name)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -63,20 +87,22 @@ class SignUpSerializer(serializers.Serializer):
     def validate(self, data):
         username = data.get('username')
         email = data.get('email')
-        if (
-            User.objects.filter(username=username).exists()
-            and User.objects.get(username=username).email != email
-        ):
-            raise serializers.ValidationError(
-                'Пользователь с таким email уже есть'
-            )
-        if (
-            User.objects.filter(email=email).exists()
-            and User.objects.get(email=email).username != username
-        ):
-            raise serializers.ValidationError(
-                'Пользователь с таким username уже есть'
-            )
+        # Один запрос вместо отдельных проверок username и email;
+        # найденный пользователь нужен представлению sign_up.
+        self.existing_user = None
+        for user in User.objects.filter(
+            Q(username=username) | Q(email=email)
+        )[:2]:
+            if user.username == username and user.email == email:
+                self.existing_user = user
+            elif user.username == username:
+                raise serializers.ValidationError(
+                    'Пользователь с таким email уже есть'
+                )
+            else:
+                raise serializers.ValidationError(
+                    'Пользователь с таким username уже есть'
+                )
         return data
 
 
@@ -98,7 +124,7 @@ class AuthSerializer(serializers.Serializer):
         return data
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(slug_field='username',
                                           read_only=True)
     title = serializers.SlugRelatedField(slug_field='name', read_only=True)
@@ -107,25 +133,12 @@ class ReviewSerializer(serializers.ModelSerializer):
         max_value=10,
     )
 
-    def validate(self, data):
-        request = self.context['request']
-        author = request.user
-        title_id = self.context['view'].kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if request.method == 'POST':
-            if Review.objects.filter(
-                    title=title,
-                    author=author
-            ).exists():
-                raise ValidationError('Извините, возможен только один отзыв')
-        return data
-
     class Meta:
         fields = '__all__'
         model = Review
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(slug_field='username',
                                           read_only=True)
     review = serializers.SlugRelatedField(slug_field='text', read_only=True)
@@ -135,6 +148,19 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ('review',)
         model = Comment
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        # ?review_format=id отдаёт id отзыва вместо его полного текста
+        if (
+            request is not None
+            and 'review' in self.fields
+            and request.query_params.get('review_format') == 'id'
+        ):
+            self.fields['review'] = serializers.PrimaryKeyRelatedField(
+                read_only=True
+            )
+
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -160,7 +186,7 @@ class TitleCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('score_sum', 'updated_at')
 
     def validate_year(self, value):
         year = dt.date.today().year
@@ -171,11 +197,22 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         return value
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category = CategorySerializer()
     genre = GenreSerializer(many=True)
     rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('score_sum', 'updated_at')
+
+
+class TopTitleSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='title_id')
+    name = serializers.CharField(source='title.name')
+    year = serializers.IntegerField(source='title.year')
+    rating = serializers.IntegerField()
+
+    class Meta:
+        model = TitleRanking
+        fields = ('id', 'name', 'year', 'rating', 'review_count')
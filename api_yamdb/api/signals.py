@@ -0,0 +1,105 @@
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from api.authentication import TOKEN_VERSION_FIELDS, forget_token_version
+from api.cache import invalidate
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, instance, **kwargs):
+    invalidate('categories', 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genres(sender, instance, **kwargs):
+    invalidate('genres', 'titles')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    invalidate('titles', f'reviews:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, **kwargs):
+    if kwargs['action'].startswith('post_'):
+        invalidate('titles')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    # Рейтинг произведения и текст отзыва в комментариях зависят от отзыва
+    invalidate(
+        'titles',
+        f'reviews:{instance.title_id}',
+        f'comments:{instance.pk}'
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    invalidate(f'comments:{instance.review_id}')
+
+
+@receiver(pre_save, sender=User)
+def check_token_claims(sender, instance, update_fields=None, **kwargs):
+    # Выданные токены содержат имя и роль: если они или активность
+    # пользователя меняются, токены со старой версией больше не
+    # принимаются по одним claims.
+    instance.token_fields_changed = False
+    instance.username_changed = False
+    if update_fields is not None and not set(update_fields) & set(
+        TOKEN_VERSION_FIELDS
+    ):
+        return
+    previous = User.objects.filter(pk=instance.pk).values(
+        *TOKEN_VERSION_FIELDS
+    ).first()
+    if previous is None:
+        return
+    instance.token_fields_changed = any(
+        previous[field] != getattr(instance, field)
+        for field in TOKEN_VERSION_FIELDS
+    )
+    instance.username_changed = previous['username'] != instance.username
+
+
+@receiver(post_save, sender=User)
+def bump_token_version(sender, instance, **kwargs):
+    if not getattr(instance, 'token_fields_changed', False):
+        return
+    User.objects.filter(pk=instance.pk).update(
+        token_version=F('token_version') + 1
+    )
+    instance.refresh_from_db(fields=('token_version',))
+    forget_token_version(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(sender, instance, **kwargs):
+    # Имя автора входит в отзывы и комментарии. При удалении пользователя
+    # его отзывы и комментарии удаляются каскадом и сбрасывают кэш сами.
+    if not getattr(instance, 'username_changed', False):
+        return
+    scopes = {
+        f'reviews:{title_id}'
+        for title_id in instance.reviews.values_list('title_id', flat=True)
+    } | {
+        f'comments:{review_id}'
+        for review_id in instance.comments.values_list('review_id', flat=True)
+    }
+    if scopes:
+        invalidate(*scopes)
+
+
+@receiver(post_delete, sender=User)
+def delete_token_version(sender, instance, **kwargs):
+    forget_token_version(instance.pk)
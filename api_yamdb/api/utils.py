@@ -0,0 +1,20 @@
+from collections import defaultdict
+
+from reviews.models import GenreTitle
+
+
+def attach_genres(titles, links):
+    genres = defaultdict(list)
+    for link in links:
+        genres[link.title_id].append(link.genre)
+    for title in titles:
+        # Тот же кеш, который заполняет prefetch_related('genre')
+        title._prefetched_objects_cache = {'genre': genres[title.pk]}
+
+
+def genre_links(titles):
+    return list(
+        GenreTitle.objects.filter(title__in=titles).select_related(
+            'genre'
+        ).order_by('genre__name', 'genre__id')
+    )
@@ -1,23 +1,83 @@
+from functools import partial
 from uuid import uuid4
 
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from api.authentication import get_access_token
+from api.bulk import BulkCreateMixin, item_error
+from api.cache import CachedListMixin, CachedResponseMixin, invalidate
+from api.concurrency import run_concurrently
+from api.export import StreamingExportMixin
 from api.filters import TitleFilter
+from api.pagination import FeedPagination
 from api.permissions import UserIsAdmin, UserIsAdminOrReadOnly, UserIsModerator
 from api.serializers import (AuthSerializer, CategorySerializer,
                              CommentSerializer, GenreSerializer,
                              ReviewSerializer, SignUpSerializer,
                              TitleCreateSerializer, TitleSerializer,
-                             UserProfileSerializers, UserSerializer)
+                             TopTitleSerializer, UserProfileSerializers,
+                             UserSerializer)
+from api.utils import attach_genres, genre_links
 from api_yamdb.settings import EMAIL_ADMIN
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.models import (Category, Genre, OutgoingEmail, Review, Title,
+                            User)
+
+ONE_REVIEW_ERROR = 'Извините, возможен только один отзыв'
+
+
+def get_model_columns(model, names):
+    columns = []
+    for name in names:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.concrete and not field.many_to_many:
+            columns.append(name)
+    return columns
+
+
+class SparseQuerysetMixin:
+    # Связи подгружаются, только если их поля попали в ответ, а при
+    # ?fields= и ?omit= запрос выбирает лишь нужные столбцы.
+    sparse_select_related = ()
+    sparse_prefetch_related = ()
+
+    def get_queryset(self):
+        return self.get_sparse_queryset(super().get_queryset())
+
+    def get_sparse_queryset(self, queryset):
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        sources = {
+            field.source.split('.')[0]
+            for field in self.get_serializer().fields.values()
+        }
+        select = [n for n in self.sparse_select_related if n in sources]
+        if select:
+            queryset = queryset.select_related(*select)
+        prefetch = [n for n in self.sparse_prefetch_related if n in sources]
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        params = self.request.query_params
+        if 'fields' not in params and 'omit' not in params:
+            return queryset
+        # Внешние ключи нужны, чтобы связанный менеджер (title.reviews)
+        # подставил уже известный объект без запроса на каждую строку.
+        meta = queryset.model._meta
+        names = sources.union(
+            (name.lstrip('-') for name in meta.ordering),
+            (field.name for field in meta.concrete_fields if field.many_to_one)
+        )
+        return queryset.only(*get_model_columns(queryset.model, names))
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -51,35 +111,36 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+def queue_confirmation_code(user, email):
+    # Письмо отправит команда send_queued_mail, запрос не ждёт SMTP
+    OutgoingEmail.objects.create(
+        subject='Код для доступа к токену',
+        body=f'{user.confirmation_code}',
+        from_email=EMAIL_ADMIN,
+        recipient=email,
+    )
+
+
 @api_view(['POST'])
 @permission_classes((AllowAny,))
 def sign_up(requset):
     serializers = SignUpSerializer(data=requset.data)
     serializers.is_valid(raise_exception=True)
     email = serializers.validated_data['email']
-    username = serializers.validated_data['username']
-    valid_user = User.objects.filter(email=email, username=username)
-    if valid_user.exists():
-        send_mail(
-            'Код для доступа к токену',
-            f'{valid_user[0].confirmation_code}',
-            EMAIL_ADMIN,
-            [f'{email}'],
-        )
+    user = serializers.existing_user
+    if user is not None:
+        queue_confirmation_code(user, email)
         return Response(status=status.HTTP_400_BAD_REQUEST)
-    if not valid_user.exists():
-        confirmation_code = uuid4()
-        user, created = User.objects.get_or_create(
-            **serializers.validated_data,
-            confirmation_code=confirmation_code
-        )
-        send_mail(
-            'Код для доступа к токену',
-            f'{user.confirmation_code}',
-            EMAIL_ADMIN,
-            [f'{email}'],
-        )
-        return Response(serializers.data, status=status.HTTP_200_OK)
+    try:
+        with transaction.atomic():
+            user = User.objects.create(
+                **serializers.validated_data,
+                confirmation_code=uuid4()
+            )
+    except IntegrityError:
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+    queue_confirmation_code(user, email)
+    return Response(serializers.data, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -92,24 +153,66 @@ def get_token_for_user(requset):
     user = get_object_or_404(User, username=username)
     if confirmation_code != user.confirmation_code:
         return Response(status=status.HTTP_400_BAD_REQUEST)
-    token = RefreshToken.for_user(user)
     return Response(
-        {'token': str(token.access_token)},
+        {'token': str(get_access_token(user))},
         status=status.HTTP_200_OK
     )
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(BulkCreateMixin, StreamingExportMixin, CachedResponseMixin,
+                    SparseQuerysetMixin, viewsets.ModelViewSet):
+    pagination_class = FeedPagination
+    replica_reads = True
     serializer_class = ReviewSerializer
+    sparse_select_related = ('author',)
     permission_classes = (UserIsModerator,)
 
+    def get_cache_scopes(self):
+        return (f'reviews:{self.kwargs.get("title_id")}',)
+
+    @cached_property
+    def title(self):
+        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return self.get_sparse_queryset(self.title.reviews.all())
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        # Уникальность отзыва проверяет ограничение unique_riview в базе,
+        # это дешевле предварительного запроса и не допускает гонок.
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    author_id=self.request.user.id, title=self.title
+                )
+        except IntegrityError:
+            raise ValidationError(ONE_REVIEW_ERROR)
+
+    def get_bulk_kwargs(self):
+        return {'title': self.title}
+
+    def exclude_bulk_conflicts(self, reviews):
+        authors = set(self.title.reviews.filter(
+            author_id__in=[review.author_id for _, review in reviews]
+        ).values_list('author_id', flat=True))
+        accepted, conflicts = [], []
+        for index, review in reviews:
+            if review.author_id in authors:
+                conflicts.append(item_error(
+                    index, {'non_field_errors': [ONE_REVIEW_ERROR]}
+                ))
+            else:
+                authors.add(review.author_id)
+                accepted.append((index, review))
+        return accepted, conflicts
+
+    def perform_bulk_create(self, reviews):
+        # Рейтинг и кеш обновляются один раз на весь пакет
+        super().perform_bulk_create(reviews)
+        Title.objects.filter(pk=self.title.pk).apply_review_delta(
+            len(reviews), sum(review.score for review in reviews)
+        )
+        invalidate('titles', f'reviews:{self.title.pk}')
 
     def get_permissions(self):
         if self.action == 'list' or self.action == 'retrieve':
@@ -117,21 +220,39 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(BulkCreateMixin, CachedResponseMixin, SparseQuerysetMixin,
+                     viewsets.ModelViewSet):
+    pagination_class = FeedPagination
+    replica_reads = True
     serializer_class = CommentSerializer
+    sparse_select_related = ('author',)
     permission_classes = (UserIsModerator,)
 
+    def get_cache_scopes(self):
+        return (f'comments:{self.kwargs.get("review_id")}',)
+
+    @cached_property
+    def review(self):
+        return get_object_or_404(
+            Review,
+            pk=self.kwargs.get('review_id'),
+            title__id=self.kwargs.get('title_id')
+        )
+
     def get_queryset(self):
-        review_id = self.kwargs.get('review_id')
-        title_id = self.kwargs.get('title_id')
-        review = get_object_or_404(Review, pk=review_id, title__id=title_id)
-        return review.comments.all()
+        # Отзыв подставляется в комментарии связанным менеджером,
+        # отдельных запросов за ним не будет.
+        return self.get_sparse_queryset(self.review.comments.all())
 
     def perform_create(self, serializer):
-        review_id = self.kwargs.get('review_id')
-        title_id = self.kwargs.get('title_id')
-        review = get_object_or_404(Review, pk=review_id, title__id=title_id)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author_id=self.request.user.id, review=self.review)
+
+    def get_bulk_kwargs(self):
+        return {'review': self.review}
+
+    def perform_bulk_create(self, comments):
+        super().perform_bulk_create(comments)
+        invalidate(f'comments:{self.review.pk}')
 
     def get_permissions(self):
         if self.action == 'list' or self.action == 'retrieve':
@@ -146,47 +267,106 @@ class CreateDestroyListViewSet(mixins.CreateModelMixin,
     pass
 
 
-class CategoryViewSet(CreateDestroyListViewSet):
+class TopTitlesMixin:
+    top_limit = 10
+    top_max_limit = 100
+
+    @action(detail=True, methods=['get'], url_path='top')
+    def top(self, request, slug=None):
+        try:
+            limit = int(request.query_params.get('limit', self.top_limit))
+        except ValueError:
+            limit = self.top_limit
+        limit = min(max(limit, 1), self.top_max_limit)
+        rankings = self.get_object().rankings.select_related('title')[:limit]
+        return Response(TopTitleSerializer(rankings, many=True).data)
+
+
+class CategoryViewSet(TopTitlesMixin, CachedListMixin,
+                      CreateDestroyListViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (UserIsAdmin,)
+    cache_scope = 'categories'
+    replica_reads = True
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
 
     def get_permissions(self):
-        if self.action == 'list':
+        if self.action in ('list', 'top'):
             return (AllowAny(),)
         return super().get_permissions()
 
 
-class GenreViewSet(CreateDestroyListViewSet):
+class GenreViewSet(TopTitlesMixin, CachedListMixin, CreateDestroyListViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (UserIsAdmin,)
+    cache_scope = 'genres'
+    replica_reads = True
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
 
     def get_permissions(self):
-        if self.action == 'list':
+        if self.action in ('list', 'top'):
             return (AllowAny(),)
         return super().get_permissions()
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')
-    ).all()
+class TitleViewSet(StreamingExportMixin, CachedResponseMixin,
+                   SparseQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.all()
+    sparse_select_related = ('category',)
+    sparse_prefetch_related = ('genre',)
     serializer_class = TitleSerializer
     permission_classes = (UserIsAdmin,)
+    cache_scope = 'titles'
+    replica_reads = True
     filterset_class = TitleFilter
+    lookup_value_regex = r'\d+'
 
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH',):
             return TitleCreateSerializer
         return TitleSerializer
 
+    # Жанры читаются отдельным запросом по тем же условиям, что и
+    # произведения, поэтому под ASGI оба запроса идут одновременно.
+    def get_page_queries(self, queryset, page):
+        if 'genre' not in queryset._prefetch_related_lookups:
+            return (partial(list, queryset[page]),)
+        return (
+            partial(list, queryset.prefetch_related(None)[page]),
+            partial(genre_links, queryset.values('pk')[page]),
+        )
+
+    def build_page(self, titles, links=None):
+        if links is not None:
+            attach_genres(titles, links)
+        return titles
+
+    def get_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if 'genre' not in queryset._prefetch_related_lookups:
+            return super().get_object()
+        pk = self.kwargs['pk']
+        title, links = run_concurrently(
+            self.request,
+            partial(
+                get_object_or_404, queryset.prefetch_related(None), pk=pk
+            ),
+            partial(genre_links, [pk]),
+        )
+        self.check_object_permissions(self.request, title)
+        return self.build_page([title], links)[0]
+
+    def prepare_export_chunk(self, titles, serializer):
+        if 'genre' in serializer.fields:
+            attach_genres(titles, genre_links([title.pk for title in titles]))
+        return titles
+
     def get_permissions(self):
         if self.action == 'list' or self.action == 'retrieve':
             return (UserIsAdminOrReadOnly(),)
@@ -1,7 +1,13 @@
 import os
 
-from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+# В Django 2.2 нет ASGI-обработчика: запросы выполняет WSGI-приложение
+# в пуле потоков.
+wsgi_application = get_wsgi_application()
+
+from api.asgi_handler import ASGIHandler  # noqa: E402
+
+application = ASGIHandler(wsgi_application)
@@ -0,0 +1,83 @@
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+POSTGRES_SCHEMES = ('postgres', 'postgresql', 'pgsql')
+
+
+def database_from_url(url, conn_max_age=0, health_checks=False,
+                      pool_size=0, pool_timeout=30, sqlite_busy_timeout=5000):
+    parts = urlsplit(url)
+    if parts.scheme == 'sqlite':
+        # sqlite:///db.sqlite3 — относительный путь, sqlite:////tmp/db — полный
+        return {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': parts.path[1:] or ':memory:',
+            'CONN_MAX_AGE': conn_max_age,
+            'CONN_HEALTH_CHECKS': health_checks,
+            'OPTIONS': {'timeout': sqlite_busy_timeout / 1000},
+            'BUSY_TIMEOUT': sqlite_busy_timeout,
+        }
+    if parts.scheme not in POSTGRES_SCHEMES:
+        raise ValueError(f'Неподдерживаемая схема DATABASE_URL: {url}')
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': unquote(parts.path[1:]),
+        'USER': unquote(parts.username or ''),
+        'PASSWORD': unquote(parts.password or ''),
+        'HOST': parts.hostname or '',
+        'PORT': str(parts.port or ''),
+        'CONN_MAX_AGE': conn_max_age,
+        'CONN_HEALTH_CHECKS': health_checks,
+        'OPTIONS': dict(parse_qsl(parts.query)),
+    }
+    if pool_size:
+        # Соединения живут в пуле, Django берёт и возвращает их на запрос
+        database.update(
+            ENGINE='api_yamdb.db_pool',
+            CONN_MAX_AGE=0,
+            POOL_MAX_SIZE=pool_size,
+            POOL_TIMEOUT=pool_timeout,
+        )
+    return database
+
+
+def replicas_from_urls(urls, **options):
+    replicas = {}
+    for number, url in enumerate(filter(None, urls.split(',')), 1):
+        replica = database_from_url(url.strip(), **options)
+        # В тестах реплика читает ту же базу, что и основное соединение
+        replica['TEST'] = {'MIRROR': 'default'}
+        replicas[f'replica_{number}'] = replica
+    return replicas
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    # WAL позволяет читать во время записи, а busy_timeout заставляет
+    # писателей ждать блокировку вместо ошибки «database is locked».
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(
+            'PRAGMA busy_timeout=%d'
+            % connection.settings_dict.get('BUSY_TIMEOUT', 5000)
+        )
+
+
+@receiver(request_started)
+def close_unusable_connections(**kwargs):
+    # Постоянное соединение могло оборваться между запросами
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not connection.in_atomic_block
+            and not connection.is_usable()
+        ):
+            connection.close()
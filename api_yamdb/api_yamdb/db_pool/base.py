@@ -0,0 +1,72 @@
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError
+
+try:
+    from psycopg2 import pool
+except ImportError as error:
+    raise ImproperlyConfigured(
+        f'Для пула соединений (DB_POOL_SIZE) нужен psycopg2: {error}'
+    )
+
+from django.db.backends.postgresql import base  # noqa: E402
+
+pools = {}
+# Свободные места в пуле: ThreadedConnectionPool при исчерпании сразу
+# бросает PoolError, а поток должен подождать освободившееся соединение.
+slots = {}
+pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # PostgreSQL с пулом соединений psycopg2: при закрытии соединение
+    # возвращается в пул процесса, а не рвётся.
+    def get_pool(self, conn_params):
+        with pools_lock:
+            if self.alias not in pools:
+                pools[self.alias] = pool.ThreadedConnectionPool(
+                    self.settings_dict.get('POOL_MIN_SIZE', 1),
+                    self.settings_dict['POOL_MAX_SIZE'],
+                    **conn_params
+                )
+                slots[self.alias] = threading.BoundedSemaphore(
+                    self.settings_dict['POOL_MAX_SIZE']
+                )
+            return pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        connections = self.get_pool(conn_params)
+        timeout = self.settings_dict.get('POOL_TIMEOUT', 30)
+        if not slots[self.alias].acquire(timeout=timeout):
+            raise OperationalError(
+                f'Нет свободного соединения в пуле {self.alias} '
+                f'за {timeout} с (DB_POOL_SIZE)'
+            )
+        try:
+            connection = connections.getconn()
+            if connection.closed:
+                connections.putconn(connection, close=True)
+                connection = connections.getconn()
+        except BaseException:
+            slots[self.alias].release()
+            raise
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            try:
+                with self.wrap_database_errors:
+                    pools[self.alias].putconn(
+                        self.connection, close=bool(self.connection.closed)
+                    )
+            finally:
+                slots[self.alias].release()
@@ -0,0 +1,31 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+# Включается middleware только на время безопасного запроса к API
+reading_from_replica = ContextVar('reading_from_replica', default=False)
+
+
+def replica_reads_active():
+    return reading_from_replica.get() and bool(settings.REPLICA_DATABASES)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Учётные записи читаем с основной базы: после смены роли
+        # реплика может ещё отдавать старые права.
+        if (
+            replica_reads_active()
+            and model._meta.label != settings.AUTH_USER_MODEL
+        ):
+            return random.choice(settings.REPLICA_DATABASES)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
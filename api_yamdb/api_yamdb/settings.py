@@ -3,6 +3,8 @@ from datetime import timedelta
 
 from dotenv import load_dotenv
 
+from api_yamdb.database import database_from_url, replicas_from_urls
+
 load_dotenv()
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -25,11 +27,12 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
-    'api',
-    'reviews'
+    'api.apps.ApiConfig',
+    'reviews.apps.ReviewsConfig',
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -37,6 +40,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.QueryProfilingMiddleware',
+    'api.middleware.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -61,13 +66,86 @@ TEMPLATES = [
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 
+database_options = {
+    'conn_max_age': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+    'health_checks': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 0)),
+    'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+    'sqlite_busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+}
+
 DATABASES = {
+    'default': database_from_url(
+        os.getenv(
+            'DATABASE_URL',
+            'sqlite:///' + os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
+        **database_options
+    ),
+    # Реплики только для чтения, DATABASE_REPLICA_URLS через запятую
+    **replicas_from_urls(
+        os.getenv('DATABASE_REPLICA_URLS', ''), **database_options
+    ),
+}
+
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['api_yamdb.routers.PrimaryReplicaRouter']
+
+# Сколько секунд после записи клиент читает с основной базы
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'api_yamdb'),
     }
 }
 
+API_CACHE_TIMEOUT = 60 * 5
+
+# Каталог для метрик воркеров: каждый процесс пишет свой файл, /metrics
+# суммирует их. Без каталога метрики считаются в памяти процесса.
+METRICS_DIR = os.getenv('METRICS_DIR')
+# Адреса, с которых доступен /metrics (REMOTE_ADDR), через запятую
+METRICS_ALLOWED_IPS = [
+    address.strip() for address in os.getenv(
+        'METRICS_ALLOWED_IPS', '127.0.0.1,::1'
+    ).split(',') if address.strip()
+]
+
+# Профилирование запросов к базе: заголовки X-Query-Count и Server-Timing,
+# предупреждение, если одинаковый запрос повторился больше порога
+QUERY_PROFILING = os.getenv('QUERY_PROFILING', 'False') == 'True'
+QUERY_PROFILING_DUPLICATE_THRESHOLD = 5
+
+# Потоки, в которых api_yamdb.asgi выполняет запросы через стек Django
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 16))
+# Потоки для независимых запросов к базе внутри одного ответа под ASGI
+ASGI_QUERY_THREADS = int(os.getenv('ASGI_QUERY_THREADS', 16))
+
+# Строк в одной порции потоковой выгрузки /export/
+EXPORT_CHUNK_SIZE = 2000
+
+# Наибольший размер пакета для /reviews/bulk/ и /comments/bulk/
+BULK_CREATE_MAX_ITEMS = 100
+
+# auto — полнотекстовый поиск PostgreSQL, FTS5 в SQLite, если таблица
+# индекса создана, иначе индекс в памяти каждого воркера (fts5, postgresql,
+# memory выбирают явно)
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+SEARCH_INDEX_TTL = 60
+# updated_at записывается до коммита, и изменение становится видно позже
+# своего updated_at. Выборки изменённых произведений по updated_at
+# захватывают столько секунд до прошлой выборки: самая долгая транзакция
+# записи плюс расхождение часов между серверами.
+UPDATED_AT_LAG = int(os.getenv('UPDATED_AT_LAG', 300))
+# Поиск ?name= отдаёт не больше стольких самых релевантных произведений,
+# count в ответе тоже считается только по ним.
+SEARCH_RESULTS_LIMIT = int(os.getenv('SEARCH_RESULTS_LIMIT', 1000))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -104,18 +182,22 @@ AUTH_USER_MODEL = 'reviews.User'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+EMAIL_QUEUE_BATCH_SIZE = 100
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_RETRY_DELAY = 60
+EMAIL_QUEUE_CLAIM_TIMEOUT = 300
 
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.RoleTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.ConcurrentLimitOffsetPagination',
     'PAGE_SIZE': 10,
 }
 
@@ -123,5 +205,8 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+# Сколько секунд GET запросы могут брать версию токенов пользователя из
+# кеша. Изменяющие запросы всегда сверяют её с базой.
+TOKEN_VERSION_CACHE_TIMEOUT = 30
 
 EMAIL_ADMIN = 'admin@yamdb.com'
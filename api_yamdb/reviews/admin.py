@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+from .models import (Category, Comment, Genre, GenreTitle, OutgoingEmail,
+                     Review, Title, TitleRanking, User)
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -70,10 +71,25 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ('review', 'text',)
 
 
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'recipient',
+        'subject',
+        'created',
+        'sent_at',
+        'attempts'
+    )
+    search_fields = ('recipient', 'subject')
+    list_filter = ('sent_at',)
+
+
 admin.site.register(User, UserAdmin)
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Genre, GenreAdmin)
 admin.site.register(Title, TitleAdmin)
 admin.site.register(GenreTitle)
+admin.site.register(TitleRanking)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
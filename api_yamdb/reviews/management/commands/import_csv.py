@@ -0,0 +1,109 @@
+import csv
+import os
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from reviews.models import (GLOBAL_CACHE_SCOPE, CacheVersion, Category,
+                            Comment, Genre, GenreTitle, Review, Title, User)
+from reviews.search import get_search_index
+
+# Порядок важен: внешние ключи ссылаются на уже загруженные записи.
+# Значения словаря переименовывают колонки CSV в поля модели.
+CSV_FILES = (
+    ('users.csv', User, {}),
+    ('category.csv', Category, {}),
+    ('genre.csv', Genre, {}),
+    ('titles.csv', Title, {'category': 'category_id'}),
+    ('genre_title.csv', GenreTitle, {}),
+    ('review.csv', Review, {'author': 'author_id'}),
+    ('comments.csv', Comment, {'author': 'author_id'}),
+)
+
+
+@contextmanager
+def keep_csv_dates(*models):
+    # bulk_create перезаписывает auto_now_add поля текущим временем,
+    # а даты публикации нужно взять из файла.
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Загружает данные из CSV файлов static/data в базу'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Каталог с CSV файлами'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк в одном INSERT'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        models = [model for _, model, _ in CSV_FILES]
+        with transaction.atomic(), keep_csv_dates(*models):
+            for filename, model, columns in CSV_FILES:
+                filepath = os.path.join(path, filename)
+                if not os.path.exists(filepath):
+                    self.stdout.write(f'{filename}: файл не найден, пропущен')
+                    continue
+                count = self.import_file(filepath, model, columns, batch_size)
+                self.stdout.write(f'{filename}: загружено строк {count}')
+            self.reset_sequences(models)
+            Title.objects.recalculate_ratings()
+            get_search_index().rebuild()
+            CacheVersion.objects.bump(GLOBAL_CACHE_SCOPE)
+        self.stdout.write(self.style.SUCCESS('Импорт завершён'))
+
+    def import_file(self, filepath, model, columns, batch_size):
+        count = 0
+        with open(filepath, encoding='utf-8', newline='') as csv_file:
+            rows = csv.DictReader(csv_file)
+            objects = (
+                self.build_object(model, columns, row) for row in rows
+            )
+            while True:
+                batch = list(islice(objects, batch_size))
+                if not batch:
+                    return count
+                model.objects.bulk_create(batch, batch_size=batch_size)
+                count += len(batch)
+
+    @staticmethod
+    def build_object(model, columns, row):
+        values = {}
+        for column, raw in row.items():
+            field = model._meta.get_field(columns.get(column, column))
+            values[field.attname] = field.to_python(raw)
+        obj = model(**values)
+        if model is User:
+            obj.set_unusable_password()
+        return obj
+
+    @staticmethod
+    def reset_sequences(models):
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
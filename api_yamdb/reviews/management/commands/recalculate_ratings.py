@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import CacheVersion, Title
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг и счётчики отзывов у всех произведений'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Title.objects.recalculate_ratings()
+            CacheVersion.objects.bump('titles')
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано произведений: {updated}')
+        )
@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import LeaderboardRun, Title, TitleRanking
+
+CHUNK_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет топы произведений по категориям и жанрам для '
+        'произведений, изменившихся с прошлого запуска'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересобрать топы для всех произведений'
+        )
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        titles = Title.objects.order_by('pk')
+        last_run = LeaderboardRun.objects.values_list(
+            'started_at', flat=True
+        ).first()
+        # Полная пересборка идёт в одной транзакции с удалением старых
+        # топов, поэтому читатели не видят пустых или неполных топов.
+        with transaction.atomic():
+            if options['full']:
+                TitleRanking.objects.all().delete()
+            elif last_run is not None:
+                # Запись, закоммиченная после прошлого запуска, могла
+                # получить updated_at раньше него. Такие произведения
+                # захватывает запас UPDATED_AT_LAG, часть произведений
+                # пересчитывается повторно.
+                titles = titles.filter(updated_at__gte=last_run - timedelta(
+                    seconds=settings.UPDATED_AT_LAG
+                ))
+            ids = list(titles.values_list('pk', flat=True))
+            for start in range(0, len(ids), CHUNK_SIZE):
+                self.refresh(ids[start:start + CHUNK_SIZE], started)
+            LeaderboardRun.objects.create(started_at=started, titles=len(ids))
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено произведений: {len(ids)}')
+        )
+
+    @staticmethod
+    def refresh(ids, refreshed_at):
+        rankings = []
+        titles = Title.objects.filter(
+            pk__in=ids, rating__isnull=False
+        ).prefetch_related('genre').only(
+            'rating', 'review_count', 'category_id'
+        )
+        for title in titles:
+            values = {
+                'title': title,
+                'rating': title.rating,
+                'review_count': title.review_count,
+                'refreshed_at': refreshed_at,
+            }
+            if title.category_id is not None:
+                rankings.append(
+                    TitleRanking(category_id=title.category_id, **values)
+                )
+            rankings.extend(
+                TitleRanking(genre=genre, **values)
+                for genre in title.genre.all()
+            )
+        with transaction.atomic():
+            TitleRanking.objects.filter(title_id__in=ids).delete()
+            TitleRanking.objects.bulk_create(rankings)
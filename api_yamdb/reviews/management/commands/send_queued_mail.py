@@ -0,0 +1,118 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди OutgoingEmail'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.EMAIL_QUEUE_BATCH_SIZE,
+            help='Сколько писем отправлять через одно соединение'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а проверять очередь каждые --interval секунд'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между проверками очереди в режиме --loop'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = failed = 0
+            while True:
+                batch_sent, batch_failed = self.send_batch(
+                    options['batch_size']
+                )
+                if not batch_sent and not batch_failed:
+                    break
+                sent += batch_sent
+                failed += batch_failed
+            if sent or failed or not options['loop']:
+                self.stdout.write(f'Отправлено: {sent}, с ошибкой: {failed}')
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
+
+    def send_batch(self, batch_size):
+        emails = self.claim(batch_size)
+        if not emails:
+            return 0, 0
+        sent_ids, errors = self.send(emails)
+        # Результат записывается отдельной короткой транзакцией
+        with transaction.atomic():
+            OutgoingEmail.objects.filter(pk__in=sent_ids).update(
+                sent_at=timezone.now()
+            )
+            now = timezone.now()
+            for email, error in errors:
+                self.postpone(email, error, now)
+        return len(sent_ids), len(errors)
+
+    @staticmethod
+    def claim(batch_size):
+        # Письма забираются под блокировкой, а send_after сдвигается на
+        # EMAIL_QUEUE_CLAIM_TIMEOUT: другие отправители их пропустят, и
+        # SMTP работает уже без открытой транзакции. Если процесс упадёт,
+        # письма вернутся в очередь после истечения этого срока.
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                OutgoingEmail.objects.select_for_update(skip_locked=True)
+                .filter(
+                    sent_at__isnull=True,
+                    send_after__lte=now,
+                    attempts__lt=settings.EMAIL_QUEUE_MAX_ATTEMPTS
+                )
+                .order_by('send_after', 'id')[:batch_size]
+            )
+            OutgoingEmail.objects.filter(
+                pk__in=[email.pk for email in emails]
+            ).update(send_after=now + timedelta(
+                seconds=settings.EMAIL_QUEUE_CLAIM_TIMEOUT
+            ))
+        return emails
+
+    @staticmethod
+    def send(emails):
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as error:
+            return [], [(email, error) for email in emails]
+        sent_ids = []
+        errors = []
+        try:
+            for email in emails:
+                try:
+                    EmailMessage(
+                        email.subject, email.body, email.from_email,
+                        [email.recipient], connection=connection
+                    ).send()
+                except Exception as error:
+                    errors.append((email, error))
+                else:
+                    sent_ids.append(email.pk)
+        finally:
+            connection.close()
+        return sent_ids, errors
+
+    @staticmethod
+    def postpone(email, error, now):
+        # Экспоненциальная задержка: 1, 2, 4... интервала между попытками
+        delay = settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** email.attempts
+        email.attempts += 1
+        email.send_after = now + timedelta(seconds=delay)
+        email.last_error = str(error)
+        email.save(update_fields=('attempts', 'send_after', 'last_error'))
@@ -0,0 +1,126 @@
+import re
+import unicodedata
+
+from django.db import OperationalError, migrations
+
+# Миграция не импортирует reviews.search: DDL и анализатор текста
+# зафиксированы здесь в том виде, в котором индекс был создан.
+FTS_TABLE = 'reviews_title_fts'
+
+WORD = re.compile(r'\w+')
+CYRILLIC = re.compile(r'[а-я]')
+
+# Стеммер Snowball для русского языка
+RVRE = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых'
+    r'|ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено'
+    r'|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|((?<=[ая])(ла|на|ете|йте|ли'
+    r'|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем'
+    r'|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+I_ENDING = re.compile(r'и$')
+DERIVATIONAL = re.compile(
+    r'.*[^аеиоуыэюя]+[аеиоуыэюя]+[^аеиоуыэюя]+[аеиоуыэюя].*ость?$'
+)
+DERIVATIONAL_ENDING = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+SOFT_SIGN = re.compile(r'ь$')
+DOUBLE_N = re.compile(r'нн$')
+
+
+def stem(word):
+    match = RVRE.match(word)
+    if match is None:
+        return word
+    start, rv = match.groups()
+    temp = PERFECTIVE_GERUND.sub('', rv, 1)
+    if temp == rv:
+        rv = REFLEXIVE.sub('', rv, 1)
+        temp = ADJECTIVE.sub('', rv, 1)
+        if temp != rv:
+            rv = PARTICIPLE.sub('', temp, 1)
+        else:
+            temp = VERB.sub('', rv, 1)
+            rv = NOUN.sub('', rv, 1) if temp == rv else temp
+    else:
+        rv = temp
+    rv = I_ENDING.sub('', rv, 1)
+    if DERIVATIONAL.match(rv):
+        rv = DERIVATIONAL_ENDING.sub('', rv, 1)
+    temp = SOFT_SIGN.sub('', rv, 1)
+    if temp == rv:
+        rv = DOUBLE_N.sub('н', SUPERLATIVE.sub('', rv, 1), 1)
+    else:
+        rv = temp
+    return start + rv
+
+
+def fold(word):
+    # «й» — отдельная буква, а не «и» с диакритикой
+    return ''.join(
+        char if char == 'й' else ''.join(
+            part for part in unicodedata.normalize('NFKD', char)
+            if not unicodedata.combining(part)
+        )
+        for char in word
+    )
+
+
+def analyze(text):
+    terms = []
+    for word in WORD.findall((text or '').casefold().replace('ё', 'е')):
+        if CYRILLIC.search(word):
+            word = stem(word)
+        terms.append(fold(word))
+    return terms
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            'name, description, tokenize="unicode61 remove_diacritics 0")'
+        )
+    except OperationalError:
+        # SQLite собран без FTS5 — поиск работает через MemoryIndex
+        return
+    Title = apps.get_model('reviews', 'Title')
+    titles = Title.objects.using(schema_editor.connection.alias)
+    for pk, name, description in titles.values_list(
+        'pk', 'name', 'description'
+    ).iterator():
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [pk, ' '.join(analyze(name)), ' '.join(analyze(description))]
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_user_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(verbose_name='Начало запуска')),
+                ('titles', models.PositiveIntegerField(verbose_name='Обновлено произведений')),
+            ],
+            options={
+                'verbose_name': 'Обновление топов',
+                'verbose_name_plural': 'Обновления топов',
+                'ordering': ('-started_at',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardrun',
+            index=models.Index(fields=['started_at'], name='leaderboard_run_started_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Выражение зафиксировано здесь в том виде, в котором индекс был создан,
+# reviews.search повторяет его в запросах.
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS reviews_title_search_idx '
+            f'ON reviews_title USING GIN (({SEARCH_DOCUMENT}))'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'DROP INDEX CONCURRENTLY IF EXISTS reviews_title_search_idx'
+        )
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не выполняется внутри транзакции и не
+    # блокирует запись в reviews_title на время построения.
+    atomic = False
+
+    dependencies = [
+        ('reviews', '0013_leaderboard_run'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
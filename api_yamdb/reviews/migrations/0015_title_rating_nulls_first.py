@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def rebuild_rating_index(definition):
+    def rebuild(apps, schema_editor):
+        # Индекс пересоздаётся под тем же именем, чтобы состояние моделей
+        # Django по-прежнему ему соответствовало.
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        schema_editor.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS title_rating_new_idx '
+            f'ON reviews_title ({definition})'
+        )
+        schema_editor.execute(
+            'DROP INDEX CONCURRENTLY IF EXISTS title_rating_idx'
+        )
+        schema_editor.execute(
+            'ALTER INDEX title_rating_new_idx RENAME TO title_rating_idx'
+        )
+    return rebuild
+
+
+class Migration(migrations.Migration):
+    # На PostgreSQL произведения без оценок при сортировке по рейтингу
+    # идут как наименьшие значения: (rating NULLS FIRST, id) по возрастанию
+    # и в обратном проходе (rating DESC NULLS LAST, id DESC).
+    atomic = False
+
+    dependencies = [
+        ('reviews', '0014_title_search_postgres'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rebuild_rating_index('rating NULLS FIRST, id'),
+            rebuild_rating_index('rating, id'),
+        ),
+    ]
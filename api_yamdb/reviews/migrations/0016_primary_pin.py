@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_title_rating_nulls_first'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrimaryPin',
+            fields=[
+                ('client', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='Клиент')),
+                ('until', models.DateTimeField(db_index=True, verbose_name='Действует до')),
+            ],
+            options={
+                'verbose_name': 'Чтение с основной базы',
+                'verbose_name_plural': 'Чтение с основной базы',
+            },
+        ),
+    ]
@@ -1,6 +1,10 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import (Avg, Case, Count, F, FloatField, OuterRef,
+                              Subquery, Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
 
 
 class UserRole:
@@ -42,10 +46,16 @@ class User(AbstractUser):
         choices=ROLES,
         default='user'
     )
+    # Входит в access-токен: после смены роли токены со старой версией
+    # больше не принимаются по одним claims.
+    token_version = models.PositiveIntegerField(
+        'Версия токенов', default=0, editable=False
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+        ordering = ('username',)
         constraints = [
             models.UniqueConstraint(
                 fields=["email", "username"],
@@ -76,6 +86,10 @@ class Category(models.Model):
     class Meta:
         verbose_name = 'Категория'
         verbose_name_plural = 'Категории'
+        ordering = ('name', 'id')
+        indexes = [
+            models.Index(fields=['name', 'id'], name='category_name_idx'),
+        ]
 
 
 class Genre(models.Model):
@@ -85,11 +99,51 @@ class Genre(models.Model):
     class Meta:
         verbose_name = 'Жанр'
         verbose_name_plural = 'Жанры'
+        ordering = ('name', 'id')
+        indexes = [
+            models.Index(fields=['name', 'id'], name='genre_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    def apply_review_delta(self, count_delta, score_delta):
+        review_count = F('review_count') + count_delta
+        score_sum = F('score_sum') + score_delta
+        return self.update(
+            review_count=review_count,
+            score_sum=score_sum,
+            updated_at=timezone.now(),
+            rating=Case(
+                When(review_count__lte=-count_delta, then=Value(None)),
+                default=Cast(score_sum, FloatField()) / review_count,
+                output_field=FloatField()
+            )
+        )
+
+    def recalculate_ratings(self):
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            review_count=Coalesce(
+                Subquery(reviews.annotate(value=Count('pk')).values('value')),
+                0
+            ),
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(value=Sum('score')).values('value')),
+                0
+            ),
+            rating=Subquery(
+                reviews.annotate(value=Avg('score')).values('value'),
+                output_field=FloatField()
+            ),
+            updated_at=timezone.now()
+        )
+
+
 class Title(models.Model):
     name = models.CharField(max_length=255)
     year = models.IntegerField()
@@ -100,10 +154,37 @@ class Title(models.Model):
     )
     genre = models.ManyToManyField(
         Genre, through='GenreTitle', related_name='titles')
+    # Агрегаты по отзывам хранятся в самой записи и пересчитываются
+    # сигналами reviews.signals, чтобы чтение не обращалось к Review.
+    rating = models.FloatField(
+        'Рейтинг', null=True, blank=True, editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        'Количество отзывов', default=0, editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False
+    )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        ordering = ('name', 'id')
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_idx'),
+            models.Index(
+                fields=['category', 'year'], name='title_category_year_idx'
+            ),
+            models.Index(fields=['rating', 'id'], name='title_rating_idx'),
+            models.Index(
+                fields=['review_count', 'id'], name='title_review_count_idx'
+            ),
+            models.Index(fields=['year', 'id'], name='title_year_idx'),
+            models.Index(fields=['updated_at'], name='title_updated_at_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -116,6 +197,12 @@ class GenreTitle(models.Model):
     class Meta:
         verbose_name = 'Жанр произведения'
         verbose_name_plural = 'Жанры произведений'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['genre', 'title'],
+                name='unique_genre_title'
+            ),
+        ]
 
 
 class Review(models.Model):
@@ -140,6 +227,13 @@ class Review(models.Model):
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_recent_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['title', 'author'],
@@ -167,6 +261,172 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_recent_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class TitleRanking(models.Model):
+    # Материализованный рейтинг для топов по категориям и жанрам.
+    # Обновляется командой refresh_leaderboards.
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='rankings',
+        verbose_name='произведение'
+    )
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name='rankings',
+        null=True, blank=True, verbose_name='категория'
+    )
+    genre = models.ForeignKey(
+        Genre, on_delete=models.CASCADE, related_name='rankings',
+        null=True, blank=True, verbose_name='жанр'
+    )
+    rating = models.FloatField('Рейтинг')
+    review_count = models.PositiveIntegerField('Количество отзывов')
+    refreshed_at = models.DateTimeField('Дата обновления')
+
+    class Meta:
+        verbose_name = 'Место в топе'
+        verbose_name_plural = 'Топы произведений'
+        ordering = ('-rating', '-review_count', 'title_id')
+        indexes = [
+            models.Index(
+                fields=['category', '-rating', '-review_count', 'title'],
+                name='ranking_category_top_idx'
+            ),
+            models.Index(
+                fields=['genre', '-rating', '-review_count', 'title'],
+                name='ranking_genre_top_idx'
+            ),
+            models.Index(
+                fields=['refreshed_at'], name='ranking_refreshed_at_idx'
+            ),
+        ]
+
+
+class LeaderboardRun(models.Model):
+    # Время начала каждого запуска refresh_leaderboards: следующий запуск
+    # берёт произведения, изменившиеся после него, даже если этот ничего
+    # не записал в топы.
+    started_at = models.DateTimeField('Начало запуска')
+    titles = models.PositiveIntegerField('Обновлено произведений')
+
+    class Meta:
+        verbose_name = 'Обновление топов'
+        verbose_name_plural = 'Обновления топов'
+        ordering = ('-started_at',)
+        indexes = [
+            models.Index(
+                fields=['started_at'], name='leaderboard_run_started_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.started_at}: {self.titles}'
+
+
+class OutgoingEmail(models.Model):
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель')
+    recipient = models.EmailField('Получатель')
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    send_after = models.DateTimeField(
+        'Отправить после', default=timezone.now
+    )
+    sent_at = models.DateTimeField('Дата отправки', null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(
+                fields=['sent_at', 'send_after'],
+                name='outgoing_email_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
+
+
+# Входит в версии любого ответа API: так сбрасывается весь кеш сразу,
+# например после импорта CSV.
+GLOBAL_CACHE_SCOPE = 'all'
+
+
+class CacheVersionQuerySet(models.QuerySet):
+    def bump(self, *scopes):
+        # Обычно все строки уже есть, и хватает одного UPDATE без явной
+        # транзакции. Отсутствующая строка означает версию 0, поэтому
+        # недостающие строки создаются сразу с версией 1.
+        scopes = sorted(set(scopes))
+        now = timezone.now()
+        updated = self.filter(scope__in=scopes).update(
+            version=F('version') + 1, changed_at=now
+        )
+        if updated < len(scopes):
+            self.bulk_create(
+                [
+                    CacheVersion(scope=scope, version=1, changed_at=now)
+                    for scope in scopes
+                ],
+                ignore_conflicts=True
+            )
+
+
+class CacheVersion(models.Model):
+    # Версии кеша ответов API лежат в базе, а не в кеше процесса: их
+    # видят все воркеры, и они не вытесняются вместе с ответами.
+    scope = models.CharField('Область', max_length=64, primary_key=True)
+    version = models.PositiveIntegerField('Версия', default=0)
+    changed_at = models.DateTimeField('Дата изменения')
+
+    objects = CacheVersionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Версия кеша'
+        verbose_name_plural = 'Версии кеша'
+
+    def __str__(self):
+        return f'{self.scope}: {self.version}'
+
+
+class PrimaryPinQuerySet(models.QuerySet):
+    def pin(self, client, until):
+        # Обычно клиент уже закреплён, и хватает одного UPDATE. Новая
+        # строка заодно вытесняет истёкшие закрепления других клиентов.
+        if self.filter(client=client).update(until=until):
+            return
+        self.filter(until__lt=timezone.now()).delete()
+        self.bulk_create(
+            [PrimaryPin(client=client, until=until)], ignore_conflicts=True
+        )
+
+    def is_pinned(self, client):
+        return self.filter(client=client, until__gt=timezone.now()).exists()
+
+
+class PrimaryPin(models.Model):
+    # Клиент с токеном после записи читает с основной базы. Отметка лежит
+    # в базе, чтобы её видели все воркеры, а не только записавший.
+    client = models.CharField('Клиент', max_length=32, primary_key=True)
+    until = models.DateTimeField('Действует до', db_index=True)
+
+    objects = PrimaryPinQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Чтение с основной базы'
+        verbose_name_plural = 'Чтение с основной базы'
+
+    def __str__(self):
+        return f'{self.client}: {self.until}'
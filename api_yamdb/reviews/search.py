@@ -0,0 +1,360 @@
+import math
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+FTS_TABLE = 'reviews_title_fts'
+# Выражение GIN-индекса reviews_title_search_idx (миграция 0014): запрос
+# должен повторять его дословно, иначе PostgreSQL не использует индекс.
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B')"
+)
+# Вес совпадения в названии выше, чем в описании
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+WORD = re.compile(r'\w+')
+TSQUERY_WORD = re.compile(r'[^\W_]+')
+CYRILLIC = re.compile(r'[а-я]')
+
+# Стеммер Snowball для русского языка
+RVRE = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых'
+    r'|ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено'
+    r'|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|((?<=[ая])(ла|на|ете|йте|ли'
+    r'|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем'
+    r'|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+I_ENDING = re.compile(r'и$')
+DERIVATIONAL = re.compile(
+    r'.*[^аеиоуыэюя]+[аеиоуыэюя]+[^аеиоуыэюя]+[аеиоуыэюя].*ость?$'
+)
+DERIVATIONAL_ENDING = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+SOFT_SIGN = re.compile(r'ь$')
+DOUBLE_N = re.compile(r'нн$')
+
+
+def stem(word):
+    match = RVRE.match(word)
+    if match is None:
+        return word
+    start, rv = match.groups()
+    temp = PERFECTIVE_GERUND.sub('', rv, 1)
+    if temp == rv:
+        rv = REFLEXIVE.sub('', rv, 1)
+        temp = ADJECTIVE.sub('', rv, 1)
+        if temp != rv:
+            rv = PARTICIPLE.sub('', temp, 1)
+        else:
+            temp = VERB.sub('', rv, 1)
+            rv = NOUN.sub('', rv, 1) if temp == rv else temp
+    else:
+        rv = temp
+    rv = I_ENDING.sub('', rv, 1)
+    if DERIVATIONAL.match(rv):
+        rv = DERIVATIONAL_ENDING.sub('', rv, 1)
+    temp = SOFT_SIGN.sub('', rv, 1)
+    if temp == rv:
+        rv = DOUBLE_N.sub('н', SUPERLATIVE.sub('', rv, 1), 1)
+    else:
+        rv = temp
+    return start + rv
+
+
+def fold(word):
+    # «й» — отдельная буква, а не «и» с диакритикой
+    return ''.join(
+        char if char == 'й' else ''.join(
+            part for part in unicodedata.normalize('NFKD', char)
+            if not unicodedata.combining(part)
+        )
+        for char in word
+    )
+
+
+def analyze(text):
+    terms = []
+    for word in WORD.findall((text or '').casefold().replace('ё', 'е')):
+        if CYRILLIC.search(word):
+            word = stem(word)
+        terms.append(fold(word))
+    return terms
+
+
+class FTS5Index:
+    def search(self, query, limit):
+        terms = analyze(query)
+        if not terms:
+            return None
+        match = ' '.join(f'"{term}"*' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, %s, %s), rowid LIMIT %s',
+                [match, NAME_WEIGHT, DESCRIPTION_WEIGHT, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def update(self, title):
+        self.remove(title.pk)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+                'VALUES (%s, %s, %s)',
+                [
+                    title.pk,
+                    ' '.join(analyze(title.name)),
+                    ' '.join(analyze(title.description)),
+                ]
+            )
+
+    def remove(self, title_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title_id]
+            )
+
+    def rebuild(self):
+        from reviews.models import Title
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        for title in Title.objects.only('name', 'description').iterator():
+            self.update(title)
+
+
+def build_tsquery(query):
+    # Каждое слово ищется по началу, стемминг выполняет конфигурация russian
+    words = TSQUERY_WORD.findall(query.casefold().replace('ё', 'е'))
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+class PostgresIndex:
+    # Полнотекстовый поиск PostgreSQL. Индекс по выражению SEARCH_DOCUMENT
+    # обновляет сама база, поэтому update, remove и rebuild ничего не
+    # делают. Диакритика не отбрасывается: чтобы «amelie» находило
+    # «Amélie», нужно расширение unaccent.
+    def search(self, query, limit):
+        tsquery = build_tsquery(query)
+        if not tsquery:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id FROM reviews_title '
+                f"WHERE ({SEARCH_DOCUMENT}) @@ to_tsquery('russian', %s) "
+                f'ORDER BY ts_rank(%s::real[], ({SEARCH_DOCUMENT}), '
+                f"to_tsquery('russian', %s)) DESC, id LIMIT %s",
+                [
+                    tsquery,
+                    # Веса D, C, B (описание) и A (название)
+                    [0, 0, DESCRIPTION_WEIGHT / NAME_WEIGHT, 1],
+                    tsquery,
+                    limit,
+                ]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def update(self, title):
+        pass
+
+    def remove(self, title_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class MemoryIndex:
+    # Запасной вариант без FTS5 и PostgreSQL: инвертированный индекс в
+    # памяти процесса. Первый поиск в каждом воркере читает все
+    # произведения и держит их термы в памяти, поэтому для больших
+    # каталогов нужен FTS5 или PostgreSQL. Дальше раз в SEARCH_INDEX_TTL
+    # секунд перечитываются только произведения, изменённые с прошлого
+    # обновления. Удалённые другими процессами произведения остаются в
+    # индексе, но их отсекает фильтр по базе.
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.built_at = None
+        self.changed_since = None
+        self.refreshing = False
+
+    def reset(self):
+        self.postings = defaultdict(dict)
+        self.documents = {}
+        self.terms = []
+
+    def search(self, query, limit):
+        terms = analyze(query)
+        if not terms:
+            return None
+        self.ensure_fresh()
+        with self.lock:
+            scores = None
+            for term in terms:
+                matched = self.match_prefix(term)
+                if scores is None:
+                    scores = matched
+                else:
+                    scores = {
+                        pk: score + matched[pk]
+                        for pk, score in scores.items() if pk in matched
+                    }
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [pk for pk, _ in ranked[:limit]]
+
+    def match_prefix(self, prefix):
+        total = len(self.documents) or 1
+        matched = defaultdict(float)
+        position = bisect_left(self.terms, prefix)
+        while (
+            position < len(self.terms)
+            and self.terms[position].startswith(prefix)
+        ):
+            postings = self.postings[self.terms[position]]
+            idf = math.log(1 + total / len(postings))
+            for pk, weight in postings.items():
+                matched[pk] += weight * idf
+            position += 1
+        return matched
+
+    def update(self, title):
+        with self.lock:
+            if self.built_at is None:
+                return
+            self.add(title.pk, title.name, title.description)
+
+    def add(self, pk, name, description):
+        self.discard(pk)
+        weights = defaultdict(float)
+        for term in analyze(name):
+            weights[term] += NAME_WEIGHT
+        for term in analyze(description):
+            weights[term] += DESCRIPTION_WEIGHT
+        for term, weight in weights.items():
+            if term not in self.postings:
+                insort(self.terms, term)
+            self.postings[term][pk] = weight
+        self.documents[pk] = tuple(weights)
+
+    def remove(self, title_id):
+        with self.lock:
+            if self.built_at is not None:
+                self.discard(title_id)
+
+    def discard(self, pk):
+        for term in self.documents.pop(pk, ()):
+            postings = self.postings[term]
+            postings.pop(pk, None)
+            if not postings:
+                del self.postings[term]
+                self.terms.pop(bisect_left(self.terms, term))
+
+    def ensure_fresh(self):
+        with self.lock:
+            if self.built_at is None:
+                self.rebuild()
+                return
+            age = time.monotonic() - self.built_at
+            if self.refreshing or age <= settings.SEARCH_INDEX_TTL:
+                return
+            self.refreshing = True
+        try:
+            self.refresh()
+        finally:
+            self.refreshing = False
+
+    def refresh(self):
+        # Изменения читаются без блокировки, поиск тем временем идёт по
+        # текущему индексу.
+        from reviews.models import Title
+
+        started = timezone.now()
+        titles = list(Title.objects.filter(
+            updated_at__gte=self.changed_since
+        ).values_list('pk', 'name', 'description'))
+        with self.lock:
+            for pk, name, description in titles:
+                self.add(pk, name, description)
+            self.mark_fresh(started)
+
+    def rebuild(self):
+        from reviews.models import Title
+
+        with self.lock:
+            started = timezone.now()
+            self.reset()
+            titles = Title.objects.values_list('pk', 'name', 'description')
+            for pk, name, description in titles.iterator():
+                self.add(pk, name, description)
+            self.mark_fresh(started)
+
+    def mark_fresh(self, started):
+        self.changed_since = started - timedelta(
+            seconds=settings.UPDATED_AT_LAG
+        )
+        self.built_at = time.monotonic()
+
+
+memory_index = MemoryIndex()
+fts5_index = FTS5Index()
+postgres_index = PostgresIndex()
+
+
+fts5_tables = {}
+
+
+def has_fts5_table():
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in fts5_tables:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE type = 'table' AND name = %s",
+                [FTS_TABLE]
+            )
+            fts5_tables[name] = cursor.fetchone() is not None
+    return fts5_tables[name]
+
+
+def get_search_index():
+    backend = settings.SEARCH_BACKEND
+    if backend == 'auto':
+        if connection.vendor == 'postgresql':
+            return postgres_index
+        if has_fts5_table():
+            return fts5_index
+    elif backend == 'fts5':
+        return fts5_index
+    elif backend == 'postgresql':
+        return postgres_index
+    return memory_index
+
+
+def search_titles(query, limit=None):
+    return get_search_index().search(
+        query, limit or settings.SEARCH_RESULTS_LIMIT
+    )
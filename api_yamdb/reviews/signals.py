@@ -0,0 +1,75 @@
+from django.db.models.signals import (m2m_changed, post_delete,
+                                      post_migrate, post_save, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Review, Title
+from .search import fts5_tables, get_search_index
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, **kwargs):
+    instance._previous = None
+    if instance.pk is not None:
+        instance._previous = Review.objects.filter(
+            pk=instance.pk
+        ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    if created or previous is None:
+        Title.objects.filter(pk=instance.title_id).apply_review_delta(
+            1, int(instance.score)
+        )
+        return
+    title_id, score = previous
+    if title_id == instance.title_id:
+        Title.objects.filter(pk=title_id).apply_review_delta(
+            0, int(instance.score) - score
+        )
+        return
+    Title.objects.filter(pk=title_id).apply_review_delta(-1, -score)
+    Title.objects.filter(pk=instance.title_id).apply_review_delta(
+        1, int(instance.score)
+    )
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    Title.objects.filter(pk=instance.title_id).apply_review_delta(
+        -1, -int(instance.score)
+    )
+
+
+@receiver(post_save, sender=Title)
+def update_search_index(sender, instance, **kwargs):
+    get_search_index().update(instance)
+
+
+@receiver(post_delete, sender=Title)
+def remove_from_search_index(sender, instance, **kwargs):
+    get_search_index().remove(instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_title_on_genres_change(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    # Смена жанров меняет состав топов, refresh_leaderboards найдёт
+    # такие произведения по updated_at.
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        titles = Title.objects.filter(pk=instance.pk)
+    elif pk_set:
+        titles = Title.objects.filter(pk__in=pk_set)
+    else:
+        return
+    titles.update(updated_at=timezone.now())
+
+
+@receiver(post_migrate)
+def reset_search_backend(sender, **kwargs):
+    # Миграции создают и удаляют таблицу FTS5, её наличие проверяется заново
+    fts5_tables.clear()
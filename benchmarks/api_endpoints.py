@@ -0,0 +1,319 @@
+"""Нагрузочный прогон эндпоинтов /api/v1/ внутри процесса.
+
+Запуск из корня репозитория:
+
+    python benchmarks/api_endpoints.py --titles 5000 --output bench.json
+
+Синтетические данные создаются во временной базе SQLite, запросы идут
+через настоящие маршруты api/urls.py тестовым клиентом Django. Для каждого
+эндпоинта считаются p50/p95/p99 времени ответа, число запросов к базе и
+пик выделенной памяти на запрос. Результат в JSON удобно сравнивать между
+коммитами: --baseline печатает разницу с прошлым прогоном.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+BATCH_SIZE = 5000
+CATEGORIES = ('books', 'movies', 'music')
+WORDS = (
+    'звезда', 'ночь', 'город', 'море', 'война', 'мир', 'дорога', 'сердце',
+    'тень', 'огонь', 'песня', 'время', 'дом', 'зима', 'река', 'небо',
+)
+
+
+def setup_django(database):
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    import django
+
+    django.setup()
+
+
+def batched(objects):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def phrase(rnd, words):
+    return ' '.join(rnd.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def seed(options):
+    from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                                Title, User)
+
+    rnd = random.Random(options.seed)
+    Category.objects.bulk_create(
+        Category(pk=pk, name=slug.capitalize(), slug=slug)
+        for pk, slug in enumerate(CATEGORIES, 1)
+    )
+    Genre.objects.bulk_create(
+        Genre(pk=pk, name=f'Жанр {pk}', slug=f'genre-{pk}')
+        for pk in range(1, options.genres + 1)
+    )
+    # Пароль не хешируется: пользователи нужны только как авторы
+    for batch in batched(
+        User(pk=pk, username=f'user{pk}', email=f'user{pk}@yamdb.fake',
+             password='!')
+        for pk in range(1, options.users + 1)
+    ):
+        User.objects.bulk_create(batch)
+    for batch in batched(
+        Title(pk=pk, name=phrase(rnd, 3), year=1900 + pk % 120,
+              description=phrase(rnd, 20),
+              category_id=rnd.randint(1, len(CATEGORIES)))
+        for pk in range(1, options.titles + 1)
+    ):
+        Title.objects.bulk_create(batch)
+    for batch in batched(
+        GenreTitle(title_id=title_id, genre_id=genre_id)
+        for title_id in range(1, options.titles + 1)
+        for genre_id in rnd.sample(
+            range(1, options.genres + 1), min(3, options.genres)
+        )
+    ):
+        GenreTitle.objects.bulk_create(batch)
+    reviews_per_title = min(options.reviews, options.users)
+    for batch in batched(
+        Review(
+            pk=(title_id - 1) * reviews_per_title + number + 1,
+            title_id=title_id,
+            author_id=(title_id + number) % options.users + 1,
+            text=phrase(rnd, 40), score=rnd.randint(1, 10)
+        )
+        for title_id in range(1, options.titles + 1)
+        for number in range(reviews_per_title)
+    ):
+        Review.objects.bulk_create(batch)
+    for batch in batched(
+        Comment(review_id=review_id,
+                author_id=rnd.randint(1, options.users),
+                text=phrase(rnd, 15))
+        for review_id in range(1, options.titles * reviews_per_title + 1)
+        for _ in range(options.comments)
+    ):
+        Comment.objects.bulk_create(batch)
+
+
+def finish_seed():
+    from django.core.management import call_command
+
+    from reviews.search import get_search_index
+
+    call_command('recalculate_ratings', stdout=io.StringIO())
+    call_command('refresh_leaderboards', '--full', stdout=io.StringIO())
+    get_search_index().rebuild()
+
+
+def get_endpoints(options):
+    rnd = random.Random(options.seed)
+    reviews_per_title = min(options.reviews, options.users)
+
+    def title_id():
+        return rnd.randint(1, options.titles)
+
+    def review_path():
+        title = title_id()
+        review = (title - 1) * reviews_per_title + rnd.randint(
+            1, reviews_per_title
+        )
+        return f'/api/v1/titles/{title}/reviews/{review}/comments/'
+
+    return {
+        'categories': lambda: '/api/v1/categories/',
+        'genres': lambda: '/api/v1/genres/',
+        'category_top': lambda: (
+            f'/api/v1/categories/{rnd.choice(CATEGORIES)}/top/'
+        ),
+        'titles': lambda: f'/api/v1/titles/?offset={rnd.randint(0, 100)}',
+        'titles_by_rating': lambda: '/api/v1/titles/?ordering=-rating',
+        'titles_by_genre': lambda: (
+            f'/api/v1/titles/?genre=genre-{rnd.randint(1, options.genres)}'
+        ),
+        'titles_search': lambda: f'/api/v1/titles/?name={rnd.choice(WORDS)}',
+        'titles_sparse': lambda: '/api/v1/titles/?fields=id,name,rating',
+        'title_detail': lambda: f'/api/v1/titles/{title_id()}/',
+        'reviews': lambda: f'/api/v1/titles/{title_id()}/reviews/',
+        'reviews_cursor': lambda: (
+            f'/api/v1/titles/{title_id()}/reviews/?pagination=cursor'
+        ),
+        'comments': review_path,
+    }
+
+
+def get_client(anonymous):
+    from rest_framework.test import APIClient
+
+    from api.authentication import get_access_token
+    from reviews.models import User
+
+    client = APIClient()
+    if not anonymous:
+        # Ответы авторизованным не кешируются, поэтому меряется сам запрос
+        token = get_access_token(User.objects.get(pk=1))
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def percentile(values, number):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[number - 1]
+
+
+def measure(client, next_path, options):
+    from django.db import connection
+
+    queries = []
+
+    def count_query(execute, sql, params, many, context):
+        queries[-1] += 1
+        return execute(sql, params, many, context)
+
+    for _ in range(options.warmup):
+        client.get(next_path())
+    timings = []
+    with connection.execute_wrapper(count_query):
+        for _ in range(options.requests):
+            path = next_path()
+            queries.append(0)
+            started = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f'{path}: {response.status_code}')
+    peaks = []
+    tracemalloc.start()
+    for _ in range(options.alloc_requests):
+        path = next_path()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        client.get(path)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append((peak - before) / 1024)
+    tracemalloc.stop()
+    return {
+        'requests': options.requests,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries_per_request': round(statistics.mean(queries), 2),
+        'max_queries': max(queries),
+        'peak_alloc_kib': (
+            round(statistics.median(peaks), 1) if peaks else None
+        ),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'), cwd=BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline):
+    print(f'{"эндпоинт":<18}{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}'
+          f'{"запросов":>10}{"КиБ":>10}')
+    for name, result in results['endpoints'].items():
+        line = (
+            f'{name:<18}{result["p50_ms"]:>10.2f}{result["p95_ms"]:>10.2f}'
+            f'{result["p99_ms"]:>10.2f}{result["queries_per_request"]:>10}'
+            f'{result["peak_alloc_kib"] or 0:>10.1f}'
+        )
+        previous = baseline.get(name)
+        if previous:
+            change = result['p95_ms'] / previous['p95_ms'] * 100 - 100
+            queries = (
+                result['queries_per_request']
+                - previous['queries_per_request']
+            )
+            line += f'   p95 {change:+.0f}%, запросов {queries:+g}'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--genres', type=int, default=20)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--reviews', type=int, default=5,
+                        help='отзывов на произведение')
+    parser.add_argument('--comments', type=int, default=2,
+                        help='комментариев на отзыв')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--alloc-requests', type=int, default=20)
+    parser.add_argument('--endpoints', help='имена эндпоинтов через запятую')
+    parser.add_argument('--anonymous', action='store_true',
+                        help='запросы без токена, через кеш ответов')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--baseline', help='JSON прошлого прогона')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, 'benchmark.sqlite3'))
+        import django
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        started = time.perf_counter()
+        seed(options)
+        finish_seed()
+        print(f'Данные созданы за {time.perf_counter() - started:.1f} с')
+
+        endpoints = get_endpoints(options)
+        if options.endpoints:
+            names = options.endpoints.split(',')
+            endpoints = {name: endpoints[name] for name in names}
+        client = get_client(options.anonymous)
+        results = {
+            'meta': {
+                'revision': git_revision(),
+                'created': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'options': vars(options),
+            },
+            'endpoints': {
+                name: measure(client, next_path, options)
+                for name, next_path in endpoints.items()
+            },
+        }
+    baseline = {}
+    if options.baseline:
+        with open(options.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)['endpoints']
+    print_results(results, baseline)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Пропускная способность чтения: asgi.py против wsgi.py.
+
+Запуск из корня репозитория:
+
+    python benchmarks/asgi_vs_wsgi.py --concurrency 64 --requests 2000
+
+Данные создаются так же, как в api_endpoints.py. Оба приложения
+вызываются внутри процесса без HTTP-сервера и проходят один и тот же стек
+Django: middleware, аутентификацию и кеш. WSGI вызывается из пула потоков
+размером --concurrency, ASGI — из --concurrency сопрограмм в одном цикле
+событий с таким же числом потоков ASGI_THREADS. Под ASGI представления
+выполняют COUNT, страницу и жанры одновременно в ASGI_QUERY_THREADS
+потоках. Запросы идут с токеном, поэтому ни одна сторона не отвечает из
+кеша.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api_endpoints import (finish_seed, get_endpoints, percentile, seed,
+                           setup_django)
+
+ENDPOINTS = ('titles', 'title_detail', 'reviews', 'comments')
+
+
+def make_scopes(options, token):
+    endpoints = get_endpoints(options)
+    scopes = []
+    for number in range(options.requests):
+        next_path = endpoints[ENDPOINTS[number % len(ENDPOINTS)]]
+        path, _, query = next_path().partition('?')
+        scopes.append({
+            'type': 'http', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'query_string': query.encode(),
+            'server': ('testserver', 80), 'http_version': '1.1',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f'Bearer {token}'.encode()),
+            ],
+        })
+    return scopes
+
+
+def report(timings, elapsed):
+    return {
+        'requests': len(timings),
+        'throughput_rps': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+    }
+
+
+def run_wsgi(scopes, concurrency):
+    from api.asgi_handler import build_environ
+    from api_yamdb.wsgi import application
+
+    def request(scope):
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(status)
+
+        started = time.perf_counter()
+        result = application(build_environ(scope, b''), start_response)
+        try:
+            b''.join(result)
+        finally:
+            result.close()
+        if not statuses[0].startswith('200'):
+            raise RuntimeError(f'{scope["path"]}: {statuses[0]}')
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        timings = list(pool.map(request, scopes))
+    return timings, time.perf_counter() - started
+
+
+def run_asgi(scopes, concurrency):
+    from api_yamdb.asgi import application
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def request(scope):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        started = time.perf_counter()
+        await application(scope, receive, send)
+        if messages[0]['status'] != 200:
+            raise RuntimeError(f'{scope["path"]}: {messages[0]["status"]}')
+        return (time.perf_counter() - started) * 1000
+
+    async def worker(queue, timings):
+        for scope in queue:
+            timings.append(await request(scope))
+
+    async def main():
+        timings = []
+        queue = iter(scopes)
+        await asyncio.gather(
+            *(worker(queue, timings) for _ in range(concurrency))
+        )
+        return timings
+
+    started = time.perf_counter()
+    timings = asyncio.run(main())
+    return timings, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--genres', type=int, default=20)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--reviews', type=int, default=5)
+    parser.add_argument('--comments', type=int, default=2)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    options = parser.parse_args()
+    # Потоков у ASGI столько же, сколько одновременных запросов у WSGI
+    os.environ.setdefault('ASGI_THREADS', str(options.concurrency))
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, 'benchmark.sqlite3'))
+        from django.core.management import call_command
+
+        from api.authentication import get_access_token
+        from reviews.models import User
+
+        call_command('migrate', verbosity=0)
+        seed(options)
+        finish_seed()
+        scopes = make_scopes(
+            options, get_access_token(User.objects.get(pk=1))
+        )
+        # Прогрев: соединения, кеш версий и импорт модулей
+        run_wsgi(scopes[:50], 4)
+        run_asgi(scopes[:50], 4)
+        results = {
+            'options': vars(options),
+            'wsgi': report(*run_wsgi(scopes, options.concurrency)),
+            'asgi': report(*run_asgi(scopes, options.concurrency)),
+        }
+    print(f'{"":<6}{"запросов/с":>12}{"p50, мс":>10}{"p95, мс":>10}'
+          f'{"p99, мс":>10}')
+    for name in ('wsgi', 'asgi'):
+        result = results[name]
+        print(f'{name:<6}{result["throughput_rps"]:>12}'
+              f'{result["p50_ms"]:>10.2f}{result["p95_ms"]:>10.2f}'
+              f'{result["p99_ms"]:>10.2f}')
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Сравнение фильтра по жанрам: JOIN через genre__slug и полусоединение IN.
+
+Запуск из корня репозитория:
+
+    python benchmarks/genre_filter.py --titles 1000000
+
+Данные создаются во временной базе SQLite, рабочая база не затрагивается.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+GENRES = 20
+BATCH_SIZE = 10000
+
+
+def setup_django(database):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = database
+    django.setup()
+
+
+def seed(titles_count):
+    from reviews.models import Category, Genre, GenreTitle, Title
+
+    rnd = random.Random(0)
+    category = Category.objects.create(name='Фильм', slug='movie')
+    genres = Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(GENRES)
+    )
+    genre_ids = list(Genre.objects.values_list('pk', flat=True))
+    for start in range(0, titles_count, BATCH_SIZE):
+        stop = min(start + BATCH_SIZE, titles_count)
+        Title.objects.bulk_create(
+            Title(pk=pk + 1, name=f'Произведение {pk}', year=1900 + pk % 120,
+                  category=category)
+            for pk in range(start, stop)
+        )
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title_id=pk + 1, genre_id=genre_id)
+            for pk in range(start, stop)
+            for genre_id in rnd.sample(genre_ids, rnd.randint(1, 3))
+        )
+    return [genre.slug for genre in genres]
+
+
+def measure(queryset, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        queryset.count()
+        list(queryset.order_by('pk')[:10])
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def run(repeat):
+    from api.filters import TitleFilter
+    from reviews.models import Title
+
+    titles = Title.objects.all()
+    cases = (
+        ('один жанр', 'genre-1', titles.filter(genre__slug='genre-1')),
+        ('любой из двух', 'genre-1,genre-2',
+         titles.filter(genre__slug__in=['genre-1', 'genre-2']).distinct()),
+    )
+    for label, value, join_queryset in cases:
+        semi_queryset = TitleFilter({'genre': value}, titles).qs
+        yield label, measure(join_queryset, repeat), measure(
+            semi_queryset, repeat
+        )
+    join_queryset = titles.filter(genre__slug='genre-1').filter(
+        genre__slug='genre-2'
+    )
+    semi_queryset = TitleFilter({'genre_all': 'genre-1,genre-2'}, titles).qs
+    yield 'оба жанра', measure(join_queryset, repeat), measure(
+        semi_queryset, repeat
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titles', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(os.path.join(directory, 'benchmark.sqlite3'))
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        started = time.perf_counter()
+        seed(options.titles)
+        print(f'Создано произведений: {options.titles} '
+              f'за {time.perf_counter() - started:.1f} с')
+        print(f'{"фильтр":<16}{"JOIN, мс":>12}{"IN, мс":>12}')
+        for label, join_time, semi_time in run(options.repeat):
+            print(f'{label:<16}{join_time * 1000:>12.1f}'
+                  f'{semi_time * 1000:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -24,6 +26,15 @@ def create_users_api(admin_client):
     return user, moderator
 
 
+def move_cache_versions_back(seconds):
+    # Изменения выглядят так, будто сделаны seconds секунд назад
+    from reviews.models import CacheVersion
+
+    for version in CacheVersion.objects.all():
+        version.changed_at -= timedelta(seconds=seconds)
+        version.save()
+
+
 def auth_client(user):
     refresh = RefreshToken.for_user(user)
     client = APIClient()
@@ -0,0 +1,47 @@
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews
+
+
+class Test08TitleRating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_follows_reviews(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.review_count, title.score_sum, title.rating) == (3, 12, 4), (
+            'Проверьте, что при создании отзыва обновляются '
+            '`review_count`, `score_sum` и `rating` произведения'
+        )
+        auth_client(user).patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={'score': 9}
+        )
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum, title.rating) == (3, 18, 6), (
+            'Проверьте, что при изменении оценки отзыва пересчитывается рейтинг произведения'
+        )
+        Review.objects.filter(title=title).delete()
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum, title.rating) == (0, 0, None), (
+            'Проверьте, что при удалении отзывов рейтинг произведения сбрасывается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recalculate_ratings_command(self, admin_client, admin):
+        from reviews.models import Title
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(review_count=0, score_sum=0, rating=None)
+        call_command('recalculate_ratings')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.review_count, title.score_sum, title.rating) == (3, 12, 4), (
+            'Проверьте, что команда `recalculate_ratings` восстанавливает агрегаты по отзывам'
+        )
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert (title.review_count, title.score_sum, title.rating) == (0, 0, None), (
+            'Проверьте, что команда `recalculate_ratings` обнуляет агрегаты произведений без отзывов'
+        )
@@ -0,0 +1,38 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test09TitleQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('titles_count', [2, 30])
+    def test_01_titles_list_queries(self, client, admin_client,
+                                    django_assert_num_queries, titles_count):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        for number in range(titles_count - len(titles)):
+            copy = Title.objects.create(
+                name=f'Копия {number}', year=title.year,
+                category=title.category
+            )
+            copy.genre.set(title.genre.all())
+        # Версии кеша, COUNT для пагинации, выборка произведений с
+        # категориями и жанры
+        with django_assert_num_queries(4):
+            response = client.get(f'/api/v1/titles/?limit={titles_count}')
+        assert len(response.json()['results']) == titles_count, (
+            'Проверьте, что при GET запросе `/api/v1/titles/` возвращаются все произведения страницы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_detail_queries(self, client, admin_client,
+                                     django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/` возвращается статус 200'
+        )
@@ -0,0 +1,31 @@
+import pytest
+from django.core.management import call_command
+
+
+class Test10ImportCsv:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_static_data(self):
+        from reviews.models import Comment, GenreTitle, Review, Title, User
+
+        call_command('import_csv', batch_size=10)
+        assert User.objects.filter(username='bingobongo').exists(), (
+            'Проверьте, что команда `import_csv` загружает пользователей'
+        )
+        assert GenreTitle.objects.filter(title_id=1, genre_id=1).exists(), (
+            'Проверьте, что команда `import_csv` загружает связи жанров и произведений'
+        )
+        review = Review.objects.get(pk=1)
+        assert (review.title_id, review.author_id, review.score) == (1, 100, 10), (
+            'Проверьте, что команда `import_csv` сохраняет внешние ключи отзывов из CSV'
+        )
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что команда `import_csv` сохраняет даты публикации из CSV'
+        )
+        assert Comment.objects.filter(review_id=6).exists(), (
+            'Проверьте, что команда `import_csv` загружает комментарии'
+        )
+        title = Title.objects.get(pk=1)
+        assert title.review_count == title.reviews.count(), (
+            'Проверьте, что после импорта пересчитываются рейтинги произведений'
+        )
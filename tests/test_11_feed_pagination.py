@@ -0,0 +1,42 @@
+import pytest
+
+from .common import create_comments, create_reviews
+
+
+class Test11FeedPagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_cursor(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url)
+        assert 'count' in response.json(), (
+            'Проверьте, что по умолчанию `/api/v1/titles/{title_id}/reviews/` '
+            'использует пагинацию limit/offset'
+        )
+        response = client.get(f'{url}?pagination=cursor&limit=2')
+        data = response.json()
+        assert 'count' not in data and data['previous'] is None, (
+            'Проверьте, что параметр `pagination=cursor` включает курсорную пагинацию'
+        )
+        ids = [review['id'] for review in data['results']]
+        response = client.get(data['next'])
+        ids += [review['id'] for review in response.json()['results']]
+        assert ids == [review['id'] for review in reviews], (
+            'Проверьте, что курсорная пагинация отдаёт отзывы по порядку '
+            '(pub_date, id) без пропусков и повторов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_comments_cursor(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        response = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+            '?pagination=cursor'
+        )
+        data = response.json()
+        assert [comment['id'] for comment in data['results']] == [
+            comment['id'] for comment in comments
+        ], (
+            'Проверьте, что параметр `pagination=cursor` работает для комментариев'
+        )
@@ -0,0 +1,69 @@
+import pytest
+
+from .common import create_comments, create_reviews, create_titles
+
+
+class Test12ResponseCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cache(self, client, admin_client, django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS'
+        # Из базы читаются только версии кеша
+        with django_assert_num_queries(1):
+            response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный анонимный GET запрос `/api/v1/titles/` отдаётся из кэша'
+        )
+        assert client.get('/api/v1/titles/?limit=1')['X-Cache'] == 'MISS', (
+            'Проверьте, что ключ кэша учитывает строку запроса'
+        )
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Новое'})
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что изменение произведения сбрасывает кэш списка произведений'
+        )
+        assert 'Новое' in [title['name'] for title in response.json()['results']]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_cache_scope(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        first = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        second = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        client.get(first)
+        client.get(second)
+        admin_client.patch(f'{first}{reviews[0]["id"]}/', data={'score': 10})
+        assert client.get(first)['X-Cache'] == 'MISS', (
+            'Проверьте, что изменение отзыва сбрасывает кэш отзывов произведения'
+        )
+        assert client.get(second)['X-Cache'] == 'HIT', (
+            'Проверьте, что изменение отзыва не сбрасывает кэш отзывов других произведений'
+        )
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS'
+        assert admin_client.get(first).get('X-Cache') is None, (
+            'Проверьте, что ответы аутентифицированным пользователям не кэшируются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_author_rename(self, client, admin_client, admin):
+        comments, reviews, titles, user, _ = create_comments(admin_client, admin)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        etag = client.get(reviews_url)['ETag']
+        client.get(comments_url)
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'renamed'}
+        )
+        assert response.status_code == 200
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что смена имени автора меняет ETag его отзывов'
+        )
+        assert 'renamed' in [review['author'] for review in response.json()['results']], (
+            'Проверьте, что смена имени автора сбрасывает кэш его отзывов'
+        )
+        response = client.get(comments_url)
+        assert 'renamed' in [comment['author'] for comment in response.json()['results']], (
+            'Проверьте, что смена имени автора сбрасывает кэш его комментариев'
+        )
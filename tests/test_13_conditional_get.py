@@ -0,0 +1,90 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+from .common import create_reviews, move_cache_versions_back
+
+
+class Test13ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_etag(self, client, admin_client, admin, django_assert_max_num_queries):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        move_cache_versions_back(2)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = admin_client.get(url)
+        etag = response['ETag']
+        assert etag and response.has_header('Last-Modified'), (
+            'Проверьте, что GET запрос `/api/v1/titles/{title_id}/reviews/` '
+            'возвращает заголовки `ETag` и `Last-Modified`'
+        )
+        with django_assert_max_num_queries(2):
+            response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что при совпадении `If-None-Match` возвращается статус 304'
+        )
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        assert response.status_code == 304, (
+            'Проверьте, что при неизменном ресурсе `If-Modified-Since` возвращает статус 304'
+        )
+        admin_client.patch(f'{url}{reviews[0]["id"]}/', data={'text': 'Новый текст'})
+        response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            'Проверьте, что после изменения отзыва `ETag` меняется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_versions_in_database(self, client, admin_client, admin):
+        from django.core.cache import cache
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        etag = client.get('/api/v1/titles/')['ETag']
+        # Кеш другого воркера пуст или вытеснен, а версии общие
+        cache.clear()
+        response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что версии кэша не зависят от кэша процесса'
+        )
+        call_command('recalculate_ratings', stdout=io.StringIO())
+        response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что команда recalculate_ratings сбрасывает кэш произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_same_second_change(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url)
+        assert response.status_code == 200
+        assert not response.has_header('Last-Modified'), (
+            'Проверьте, что `Last-Modified` не отдаётся в секунду изменения: '
+            'следующее изменение в ту же секунду не изменит дату'
+        )
+        move_cache_versions_back(2)
+        last_modified = client.get(url)['Last-Modified']
+        admin_client.patch(f'{url}{reviews[0]["id"]}/', data={'text': 'Новый текст'})
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 200, (
+            'Проверьте, что после изменения `If-Modified-Since` не возвращает 304'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_bump_after_commit(self, admin_client, admin):
+        from django.db import transaction
+        from reviews.models import CacheVersion, Review
+
+        reviews, _, _, _ = create_reviews(admin_client, admin)
+        version = CacheVersion.objects.get(scope='titles').version
+        review = Review.objects.get(pk=reviews[0]['id'])
+        with transaction.atomic():
+            review.text = 'Новый текст'
+            review.save()
+            assert CacheVersion.objects.get(scope='titles').version == version, (
+                'Проверьте, что общая версия `titles` не блокируется '
+                'внутри транзакции записи'
+            )
+        assert CacheVersion.objects.get(scope='titles').version == version + 1, (
+            'Проверьте, что версия кэша увеличивается после коммита'
+        )
@@ -0,0 +1,84 @@
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+
+
+class Test14EmailQueue:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_enqueues_email(self, client):
+        from reviews.models import OutgoingEmail
+
+        outbox_before_count = len(mail.outbox)
+        data = {'email': 'queue@yamdb.fake', 'username': 'queue_user'}
+        response = client.post(self.url_signup, data=data)
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Проверьте, что запрос `{self.url_signup}` только ставит письмо в очередь'
+        )
+        email = OutgoingEmail.objects.get(recipient=data['email'])
+        call_command('send_queued_mail')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что команда `send_queued_mail` отправляет письма из очереди'
+        )
+        email.refresh_from_db()
+        assert email.sent_at is not None, (
+            'Проверьте, что отправленное письмо помечается датой отправки'
+        )
+        call_command('send_queued_mail')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что письмо не отправляется повторно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_failed_email_is_postponed(self):
+        from reviews.models import OutgoingEmail
+
+        email = OutgoingEmail.objects.create(
+            subject='Тема', body='Текст', from_email='admin@yamdb.com',
+            recipient='retry@yamdb.fake'
+        )
+        with mock.patch(
+            'django.core.mail.EmailMessage.send', side_effect=OSError('SMTP')
+        ):
+            call_command('send_queued_mail')
+        email.refresh_from_db()
+        assert email.sent_at is None and email.attempts == 1, (
+            'Проверьте, что при ошибке отправки увеличивается счётчик попыток'
+        )
+        assert email.send_after > email.created and email.last_error == 'SMTP', (
+            'Проверьте, что при ошибке отправки следующая попытка откладывается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_send_outside_transaction(self):
+        from django.db import connection
+
+        from reviews.models import OutgoingEmail
+
+        email = OutgoingEmail.objects.create(
+            subject='Тема', body='Текст', from_email='admin@yamdb.com',
+            recipient='claim@yamdb.fake'
+        )
+        calls = []
+
+        def send(message):
+            claimed = OutgoingEmail.objects.get(pk=email.pk)
+            calls.append((connection.in_atomic_block, claimed.send_after))
+            return 1
+
+        with mock.patch(
+            'django.core.mail.EmailMessage.send', autospec=True, side_effect=send
+        ):
+            call_command('send_queued_mail')
+        assert calls and not calls[0][0], (
+            'Проверьте, что письма отправляются вне транзакции'
+        )
+        assert calls[0][1] > email.send_after, (
+            'Проверьте, что на время отправки письмо забирается из очереди'
+        )
+        email.refresh_from_db()
+        assert email.sent_at is not None
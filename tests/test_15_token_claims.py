@@ -0,0 +1,103 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+class Test15TokenClaims:
+
+    def get_client(self, client, user):
+        type(user).objects.filter(pk=user.pk).update(confirmation_code='code')
+        response = client.post(
+            '/api/v1/auth/token/',
+            data={'username': user.username, 'confirmation_code': 'code'}
+        )
+        token_client = APIClient()
+        token_client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}')
+        return token_client
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_permissions_without_user_lookup(self, client, admin,
+                                                django_assert_num_queries):
+        admin_client = self.get_client(client, admin)
+        # только COUNT и выборка страницы пользователей
+        with django_assert_num_queries(2):
+            response = admin_client.get('/api/v1/users/')
+        assert response.status_code == 200, (
+            'Проверьте, что права администратора определяются по данным токена'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_demoted_user_loses_access(self, client, admin):
+        admin_client = self.get_client(client, admin)
+        admin.role = 'user'
+        admin.save()
+        response = admin_client.get('/api/v1/users/')
+        assert response.status_code == 403, (
+            'Проверьте, что после смены роли токен с устаревшими данными '
+            'проверяется по базе данных'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_revocation_survives_cache_loss(self, admin):
+        from django.core.cache import cache
+
+        from api.authentication import get_access_token
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(admin)}')
+        assert client.get('/api/v1/users/').status_code == 200
+        admin.role = 'user'
+        admin.save()
+        # Кеш вытеснен или это другой воркер со своим кешем
+        cache.clear()
+        response = client.get('/api/v1/users/')
+        assert response.status_code == 403, (
+            'Проверьте, что отзыв токена хранится в базе, а не только в кэше'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_unsafe_methods_check_database(self, admin):
+        from django.core.cache import cache
+
+        from api.authentication import TOKEN_VERSION_KEY, get_access_token
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(admin)}')
+        admin.role = 'user'
+        admin.save()
+        # Устаревшая версия в кеше другого воркера
+        cache.set(TOKEN_VERSION_KEY.format(admin.pk), 0)
+        response = client.post(
+            '/api/v1/users/',
+            data={'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        )
+        assert response.status_code == 403, (
+            'Проверьте, что изменяющие запросы сверяют версию токена с базой'
+        )
+        response = client.patch('/api/v1/users/me/', data={'bio': 'Новое'})
+        assert response.status_code == 200, (
+            'Проверьте, что токен с устаревшей версией проверяется по базе, '
+            'а не отклоняется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_deactivated_user(self, admin):
+        from django.core.cache import cache
+
+        from api.authentication import get_access_token
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(admin)}')
+        assert client.get('/api/v1/users/').status_code == 200
+        admin.is_active = False
+        admin.save()
+        cache.clear()
+        assert client.get('/api/v1/users/').status_code == 401, (
+            'Проверьте, что токен заблокированного пользователя не принимается'
+        )
+        response = client.post(
+            '/api/v1/users/',
+            data={'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        )
+        assert response.status_code == 401, (
+            'Проверьте, что заблокированный пользователь не может изменять данные'
+        )
@@ -0,0 +1,110 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test16TitleSearch:
+
+    def search(self, client, query):
+        response = client.get('/api/v1/titles/', {'name': query})
+        return [title['name'] for title in response.json()['results']]
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('backend', ['fts5', 'memory'])
+    def test_01_title_search(self, client, admin_client, settings, backend):
+        from reviews.search import memory_index
+
+        settings.SEARCH_BACKEND = backend
+        memory_index.built_at = None
+        create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Amélie', 'year': 2001, 'genre': ['comedy'],
+            'category': 'films', 'description': 'Про поворот судьбы'
+        })
+        assert self.search(client, 'ПОВОРОТАМИ') == ['Поворот туда', 'Amélie'], (
+            'Проверьте, что поиск по `name` не зависит от регистра и формы слова, '
+            'а совпадения в названии ранжируются выше совпадений в описании'
+        )
+        assert self.search(client, 'пов') == ['Поворот туда', 'Amélie'], (
+            'Проверьте, что поиск по `name` находит произведения по началу слова'
+        )
+        assert self.search(client, 'amelie') == ['Amélie'], (
+            'Проверьте, что поиск по `name` не учитывает диакритику'
+        )
+        assert self.search(client, 'драмы года') == ['Проект'], (
+            'Проверьте, что поиск по `name` учитывает описание произведения'
+        )
+        titles = admin_client.get('/api/v1/titles/', {'name': 'Проект'}).json()['results']
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Другой'})
+        assert self.search(client, 'проект') == [], (
+            'Проверьте, что поисковый индекс обновляется при изменении произведения'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert self.search(client, 'другой') == [], (
+            'Проверьте, что поисковый индекс обновляется при удалении произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('backend', ['fts5', 'memory'])
+    def test_02_results_limit(self, client, admin_client, settings, backend):
+        from reviews.search import get_search_index
+
+        settings.SEARCH_BACKEND = backend
+        settings.SEARCH_RESULTS_LIMIT = 1
+        # flush не очищает таблицу FTS5, оставшуюся от прошлых тестов
+        get_search_index().rebuild()
+        create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Amélie', 'year': 2001, 'genre': ['comedy'],
+            'category': 'films', 'description': 'Про поворот судьбы'
+        })
+        response = client.get('/api/v1/titles/', {'name': 'поворот'})
+        assert response.json()['count'] == 1, (
+            'Проверьте, что поиск по `name` возвращает не больше '
+            '`SEARCH_RESULTS_LIMIT` самых релевантных произведений'
+        )
+        assert response.json()['results'][0]['name'] == 'Поворот туда'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_memory_index_refresh(self, admin_client, settings,
+                                     monkeypatch):
+        from django.utils import timezone
+
+        from reviews.models import Title
+        from reviews.search import memory_index
+
+        settings.SEARCH_BACKEND = 'memory'
+        memory_index.built_at = None
+        create_titles(admin_client)
+        assert self.search(admin_client, 'поворот') == ['Поворот туда']
+        # Изменение из другого процесса, сигналы этого процесса его не видят
+        Title.objects.filter(name='Поворот туда').update(
+            name='Разворот', updated_at=timezone.now()
+        )
+        assert self.search(admin_client, 'разворот') == []
+
+        def rebuild():
+            raise AssertionError('полная перестройка индекса')
+
+        monkeypatch.setattr(memory_index, 'rebuild', rebuild)
+        memory_index.built_at -= settings.SEARCH_INDEX_TTL + 1
+        assert self.search(admin_client, 'разворот') == ['Разворот'], (
+            'Проверьте, что индекс в памяти дочитывает изменённые '
+            'произведения без полной перестройки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_postgresql_backend(self, settings, monkeypatch):
+        from django.db import connection
+
+        from reviews.search import build_tsquery, get_search_index, postgres_index
+
+        settings.SEARCH_BACKEND = 'auto'
+        monkeypatch.setattr(connection, 'vendor', 'postgresql')
+        assert get_search_index() is postgres_index, (
+            'Проверьте, что на PostgreSQL используется его полнотекстовый поиск'
+        )
+        assert build_tsquery('Поворот, ёлки_палки!') == (
+            'поворот:* & елки:* & палки:*'
+        )
+        assert build_tsquery('!!!') == ''
@@ -0,0 +1,26 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test17GenreFilter:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_multiple_genres(self, client, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        horror, comedy, drama = (genre['slug'] for genre in genres)
+
+        response = client.get(f'/api/v1/titles/?genre={horror},{comedy},{drama}')
+        data = response.json()
+        assert data['count'] == 2 and len(data['results']) == 2, (
+            'Проверьте, что фильтр `genre` с несколькими жанрами возвращает '
+            'произведения с любым из них без повторов'
+        )
+        response = client.get(f'/api/v1/titles/?genre_all={horror},{comedy}')
+        assert [title['id'] for title in response.json()['results']] == [titles[0]['id']], (
+            'Проверьте, что фильтр `genre_all` возвращает произведения со всеми указанными жанрами'
+        )
+        response = client.get(f'/api/v1/titles/?genre_all={horror},{drama}')
+        assert response.json()['results'] == [], (
+            'Проверьте, что фильтр `genre_all` не возвращает произведения, у которых есть не все жанры'
+        )
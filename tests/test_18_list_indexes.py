@@ -0,0 +1,104 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+
+class Test18ListIndexes:
+
+    def page_query_plan(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        page_queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and 'LIMIT' in query['sql']
+        ]
+        assert page_queries, f'Не найден запрос страницы для `{url}`'
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {page_queries[-1]}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_list_queries_use_indexes(self, client, admin_client, admin):
+        if connection.vendor != 'sqlite':
+            pytest.skip('План запроса проверяется только для SQLite')
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        title_id = titles[0]['id']
+        urls = (
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/comments/',
+        )
+        for url in urls:
+            plan = self.page_query_plan(client, url)
+            assert not any('TEMP B-TREE' in step for step in plan), (
+                f'Проверьте, что сортировка списка `{url}` выполняется по индексу. '
+                f'План запроса: {plan}'
+            )
+            assert all(
+                'USING' in step for step in plan
+                if step.startswith(('SCAN', 'SEARCH'))
+            ), (
+                f'Проверьте, что запрос списка `{url}` не сканирует таблицу целиком. '
+                f'План запроса: {plan}'
+            )
+        plan = self.page_query_plan(
+            client, f'/api/v1/titles/?category={titles[0]["category"]}&year=2000'
+        )
+        assert any('title_category_year_idx' in step for step in plan), (
+            'Проверьте, что фильтр произведений по категории и году использует индекс. '
+            f'План запроса: {plan}'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_ordering_uses_indexes(self, client, admin_client, admin):
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        response = client.get('/api/v1/titles/?ordering=-rating')
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id'], titles[1]['id']
+        ], (
+            'Проверьте, что `/api/v1/titles/?ordering=-rating` сортирует произведения по рейтингу'
+        )
+        response = client.get('/api/v1/titles/?ordering=reviews')
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            'Проверьте, что `/api/v1/titles/?ordering=reviews` сортирует произведения по числу отзывов'
+        )
+        if connection.vendor != 'sqlite':
+            return
+        for ordering in ('-rating', 'rating', '-reviews', 'year', '-name'):
+            url = f'/api/v1/titles/?ordering={ordering}'
+            plan = self.page_query_plan(admin_client, url)
+            assert not any('TEMP B-TREE' in step for step in plan), (
+                f'Проверьте, что сортировка `{url}` выполняется по индексу. '
+                f'План запроса: {plan}'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_unrated_titles_order(self, client, admin_client, admin, monkeypatch):
+        from api.filters import TitleFilter
+        from reviews.models import Title
+
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        unrated = Title.objects.exclude(rating__isnull=False).values_list('id', flat=True)
+        assert unrated, 'Нужно произведение без оценок'
+        response = client.get('/api/v1/titles/?ordering=-rating')
+        assert response.json()['results'][-1]['id'] in unrated, (
+            'Проверьте, что при сортировке `-rating` произведения без оценок идут последними'
+        )
+        response = client.get('/api/v1/titles/?ordering=rating')
+        assert response.json()['results'][0]['id'] in unrated, (
+            'Проверьте, что при сортировке `rating` произведения без оценок идут первыми'
+        )
+        monkeypatch.setattr(connection, 'vendor', 'postgresql')
+        for ordering, nulls in (('-rating', 'NULLS LAST'), ('rating', 'NULLS FIRST')):
+            sql = str(TitleFilter({'ordering': ordering}, Title.objects.all()).qs.query)
+            assert nulls in sql, (
+                f'Проверьте, что на PostgreSQL сортировка `{ordering}` '
+                f'задаёт порядок произведений без оценок: {sql}'
+            )
@@ -0,0 +1,104 @@
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews, create_titles
+
+
+class Test19Leaderboards:
+
+    def refresh(self, *args):
+        out = StringIO()
+        call_command('refresh_leaderboards', *args, stdout=out)
+        return out.getvalue()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_category_and_genre_top(self, client, admin_client, admin,
+                                       settings, django_assert_num_queries):
+        settings.UPDATED_AT_LAG = 0
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        assert 'Обновлено произведений: 2' in self.refresh()
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/categories/{titles[0]["category"]}/top/')
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/categories/{slug}/top/` доступен без токена'
+        )
+        assert response.json() == [{
+            'id': titles[0]['id'], 'name': titles[0]['name'],
+            'year': titles[0]['year'], 'rating': 4, 'review_count': 3
+        }], (
+            'Проверьте, что топ категории содержит произведения с рейтингом'
+        )
+        response = client.get(f'/api/v1/genres/{titles[0]["genre"][0]}/top/')
+        assert [title['id'] for title in response.json()] == [titles[0]['id']], (
+            'Проверьте, что `/api/v1/genres/{slug}/top/` возвращает топ жанра'
+        )
+        assert client.get(f'/api/v1/genres/{titles[1]["genre"][0]}/top/').json() == [], (
+            'Проверьте, что в топ не попадают произведения без отзывов'
+        )
+        assert client.get('/api/v1/genres/unknown/top/').status_code == 404
+
+        assert 'Обновлено произведений: 0' in self.refresh(), (
+            'Проверьте, что refresh_leaderboards не трогает неизменившиеся произведения'
+        )
+        auth_client(user).patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={'score': 9}
+        )
+        assert 'Обновлено произведений: 1' in self.refresh(), (
+            'Проверьте, что refresh_leaderboards обновляет только изменившиеся произведения'
+        )
+        response = client.get(f'/api/v1/categories/{titles[0]["category"]}/top/')
+        assert response.json()[0]['rating'] == 6
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_run_without_rankings(self, admin_client, settings):
+        settings.UPDATED_AT_LAG = 0
+        titles, _, _ = create_titles(admin_client)
+        assert 'Обновлено произведений: 2' in self.refresh()
+        assert 'Обновлено произведений: 0' in self.refresh(), (
+            'Проверьте, что время запуска сохраняется, даже если в топы '
+            'ничего не записано'
+        )
+        assert 'updated_at' not in admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/').json(), (
+            'Проверьте, что служебное поле `updated_at` не попадает в ответ'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_full_refresh_is_atomic(self, admin_client, admin):
+        from reviews.models import TitleRanking
+
+        create_reviews(admin_client, admin)
+        self.refresh()
+        count = TitleRanking.objects.count()
+        with mock.patch.object(
+            TitleRanking.objects, 'bulk_create', side_effect=RuntimeError
+        ):
+            with pytest.raises(RuntimeError):
+                self.refresh('--full')
+        assert count and TitleRanking.objects.count() == count, (
+            'Проверьте, что при ошибке `--full` старые топы не удаляются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_late_commit(self, client, admin_client, admin, settings):
+        from datetime import timedelta
+
+        from reviews.models import LeaderboardRun, Title
+
+        settings.UPDATED_AT_LAG = 60
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        self.refresh()
+        started_at = LeaderboardRun.objects.get().started_at
+        # Транзакция началась до запуска, а закоммичена после него
+        Title.objects.filter(pk=titles[0]['id']).update(
+            rating=9, updated_at=started_at - timedelta(seconds=30)
+        )
+        self.refresh()
+        response = client.get(f'/api/v1/categories/{titles[0]["category"]}/top/')
+        assert response.json()[0]['rating'] == 9, (
+            'Проверьте, что refresh_leaderboards не пропускает изменения, '
+            'закоммиченные после прошлого запуска'
+        )
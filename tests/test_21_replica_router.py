@@ -0,0 +1,113 @@
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.utils import timezone
+
+from .common import auth_client, create_titles, move_cache_versions_back
+
+REPLICA = 'replica_test'
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    # Вторая база SQLite без репликации: всё, что в неё не попало,
+    # видно только на основной базе.
+    connections.databases[REPLICA] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    call_command('migrate', database=REPLICA, verbosity=0)
+    settings.REPLICA_DATABASES = [REPLICA]
+    yield REPLICA
+    connections[REPLICA].close()
+    delattr(connections._connections, REPLICA)
+    del connections.databases[REPLICA]
+
+
+class Test21ReplicaRouter:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reads_go_to_replica(self, replica, settings, client,
+                                    admin_client, user):
+        titles, _, _ = create_titles(admin_client)
+        move_cache_versions_back(settings.REPLICA_STICKY_SECONDS)
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert response.json()['count'] == 0, (
+            'Проверьте, что анонимные GET-запросы к произведениям читаются с реплики'
+        )
+        assert auth_client(user).get('/api/v1/titles/').json()['count'] == 0, (
+            'Проверьте, что GET-запросы с токеном без недавних записей читаются с реплики'
+        )
+        assert admin_client.get('/api/v1/titles/').json()['count'] == 2, (
+            'Проверьте, что после записи клиент читает с основной базы'
+        )
+        assert admin_client.get('/api/v1/users/').json()['count'] == 2, (
+            'Проверьте, что пользователи читаются с основной базы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_read_your_writes(self, replica, settings, client,
+                                 admin_client, user):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        user_client = auth_client(user)
+        response = user_client.post(url, data={'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 201
+        move_cache_versions_back(settings.REPLICA_STICKY_SECONDS)
+        response = user_client.get(url)
+        assert response.status_code == 200
+        assert response.json()['count'] == 1, (
+            'Проверьте, что автор сразу видит свой отзыв'
+        )
+        assert client.get(url).status_code == 404, (
+            'Проверьте, что запросы без недавних записей не закреплены '
+            'за основной базой'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_recent_changes_not_cached_from_replica(self, replica, settings,
+                                                      client, admin_client, user):
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 2, (
+            'Проверьте, что сразу после изменения ответ собирается по основной '
+            'базе, а не кешируется с отстающей реплики'
+        )
+        user_client = auth_client(user)
+        response = user_client.get('/api/v1/titles/')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что недавнее изменение не переводит все чтения '
+            'на основную базу'
+        )
+        assert not response.has_header('ETag'), (
+            'Проверьте, что ответ с реплики не получает ETag недавней версии'
+        )
+        move_cache_versions_back(settings.REPLICA_STICKY_SECONDS)
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'HIT' and response.json()['count'] == 2
+        assert user_client.get('/api/v1/titles/').has_header('ETag')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_read_your_writes_across_workers(self, replica, settings,
+                                                admin_client, user):
+        from django.core.cache import cache
+
+        from reviews.models import PrimaryPin
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        user_client = auth_client(user)
+        user_client.post(url, data={'text': 'Отзыв', 'score': 7})
+        move_cache_versions_back(settings.REPLICA_STICKY_SECONDS)
+        # Клиент без cookie, а следующий запрос обслуживает другой воркер
+        user_client.cookies.clear()
+        cache.clear()
+        assert user_client.get(url).json()['count'] == 1, (
+            'Проверьте, что закрепление за основной базой после записи '
+            'видят все воркеры'
+        )
+        PrimaryPin.objects.update(until=timezone.now())
+        assert user_client.get(url).status_code == 404, (
+            'Проверьте, что закрепление за основной базой истекает'
+        )
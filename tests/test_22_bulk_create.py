@@ -0,0 +1,77 @@
+import pytest
+
+from .common import auth_client, create_reviews, create_titles, create_users_api
+
+
+class Test22BulkCreate:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk_reviews(self, admin_client, admin,
+                             django_assert_max_num_queries):
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        user, moderator = create_users_api(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/bulk/'
+        data = [
+            {'text': 'Отлично', 'score': 9, 'author': user.username},
+            {'text': 'Плохо', 'score': 11, 'author': moderator.username},
+            {'text': 'Хорошо', 'score': 7, 'author': moderator.username},
+            {'text': 'Повтор', 'score': 5, 'author': user.username},
+            {'text': 'Кто это', 'score': 5, 'author': 'nobody'},
+            {'text': 'Своё', 'score': 2},
+        ]
+        with django_assert_max_num_queries(9):
+            response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что `/api/v1/titles/{title_id}/reviews/bulk/` '
+            'возвращает 201, если создан хотя бы один отзыв'
+        )
+        body = response.json()
+        assert body['created'] == 3
+        assert [error['index'] for error in body['errors']] == [1, 3, 4], (
+            'Проверьте, что ошибки возвращаются для каждого элемента пакета'
+        )
+        assert 'score' in body['errors'][0]['errors']
+        assert 'author' in body['errors'][2]['errors']
+        assert Review.objects.filter(title_id=titles[0]['id']).count() == 3
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.review_count, title.score_sum) == (3, 18), (
+            'Проверьте, что статистика произведения обновляется для пакета'
+        )
+        assert admin_client.get(f'/api/v1/titles/{title.pk}/').json()['rating'] == 6
+
+        response = admin_client.post(url, data=data[:1], format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что пакет без созданных отзывов возвращает 400'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_comments(self, admin_client, admin):
+        from reviews.models import Comment
+
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/bulk/'
+        )
+        client = auth_client(user)
+        response = client.post(
+            url, data=[{'text': 'Первый'}, {}, {'text': 'Второй'}],
+            format='json'
+        )
+        assert response.status_code == 201
+        assert response.json() == {
+            'created': 2, 'errors': [{'index': 1, 'errors': {'text': ['Обязательное поле.']}}]
+        }
+        assert Comment.objects.filter(author=user).count() == 2
+        assert client.get(url.replace('bulk/', '')).json()['count'] == 2
+
+        response = client.post(
+            url, data=[{'text': 'Чужой', 'author': admin.username}], format='json'
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что автора элемента может указать только администратор'
+        )
+        assert client.post(url, data={'text': 'Один'}, format='json').status_code == 400
+        assert client.post(url, data=[{'text': 'x'}] * 101, format='json').status_code == 400
@@ -0,0 +1,53 @@
+import pytest
+
+from .common import create_reviews
+
+
+class Test23SparseFieldsets:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_fields(self, admin_client, admin, django_assert_num_queries):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        with django_assert_num_queries(4) as context:
+            response = admin_client.get('/api/v1/titles/?fields=id,name,rating')
+        assert response.status_code == 200
+        result = response.json()['results']
+        assert all(set(title) == {'id', 'name', 'rating'} for title in result), (
+            'Проверьте, что `?fields=` оставляет в ответе только перечисленные поля'
+        )
+        sql = context.captured_queries[-1]['sql']
+        assert 'description' not in sql and 'reviews_category' not in sql, (
+            'Проверьте, что незапрошенные столбцы и связи не выбираются из базы'
+        )
+
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/?omit=description,genre')
+        assert response.status_code == 200
+        title = response.json()
+        assert 'description' not in title and 'genre' not in title, (
+            'Проверьте, что `?omit=` убирает перечисленные поля'
+        )
+        assert title['category'] == {'name': 'Фильм', 'slug': 'films'}
+        assert title['rating'] == 4
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_review_fields(self, admin_client, admin, django_assert_max_num_queries):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with django_assert_max_num_queries(5) as context:
+            response = admin_client.get(url + '?fields=id,score')
+        assert response.status_code == 200
+        result = response.json()['results']
+        assert [set(review) for review in result] == [{'id', 'score'}] * 3
+        assert '"text"' not in context.captured_queries[-1]['sql'], (
+            'Проверьте, что текст отзыва не выбирается, если он не запрошен'
+        )
+        with django_assert_max_num_queries(5):
+            response = admin_client.get(url + '?omit=text')
+        assert all(
+            review['author'] and 'text' not in review
+            for review in response.json()['results']
+        )
+        response = admin_client.get(url)
+        assert set(response.json()['results'][0]) == {
+            'id', 'author', 'title', 'score', 'text', 'pub_date'
+        }
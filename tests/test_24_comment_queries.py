@@ -0,0 +1,35 @@
+import pytest
+
+from .common import auth_client, create_comments
+
+
+class Test24CommentQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_constant_queries(self, admin_client, admin,
+                                 django_assert_num_queries):
+        comments, reviews, titles, user, _ = create_comments(admin_client, admin)
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        client = auth_client(user)
+        # Версии кеша, пользователь токена, отзыв, количество и страница
+        # комментариев вместе с авторами
+        with django_assert_num_queries(5):
+            response = client.get(url)
+        result = response.json()['results']
+        assert len(result) == 3
+        assert {comment['author'] for comment in result} == {
+            comment['author'] for comment in comments
+        }, 'Проверьте, что авторы комментариев выбираются одним запросом'
+        assert all(comment['review'] == 'qwerty' for comment in result)
+
+        with django_assert_num_queries(5):
+            response = client.get(url + '?review_format=id')
+        assert all(
+            comment['review'] == reviews[0]['id']
+            for comment in response.json()['results']
+        ), 'Проверьте, что `?review_format=id` отдаёт id отзыва вместо текста'
+        response = client.get(f'{url}{comments[0]["id"]}/?review_format=id')
+        assert response.json()['review'] == reviews[0]['id']
@@ -0,0 +1,49 @@
+import logging
+
+import pytest
+from rest_framework.test import APIClient
+
+from api.middleware import normalize_sql
+from api.views import ReviewViewSet
+
+from .common import create_reviews
+
+
+class Test25QueryProfiling:
+
+    def test_01_normalize_sql(self):
+        assert normalize_sql(
+            "SELECT * FROM t WHERE id IN (%s, %s) AND name = 'x' LIMIT 10"
+        ) == normalize_sql(
+            "SELECT * FROM t WHERE id IN (%s) AND name = 'yy' LIMIT 20"
+        ), 'Проверьте, что значения не влияют на форму запроса'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_headers_and_warning(self, settings, admin_client, admin,
+                                    monkeypatch, caplog):
+        settings.QUERY_PROFILING = True
+        settings.QUERY_PROFILING_DUPLICATE_THRESHOLD = 2
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        client = APIClient()
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response['X-Query-Count'] == '4', (
+            'Проверьте, что заголовок X-Query-Count содержит число запросов'
+        )
+        assert response['Server-Timing'].startswith('db;dur='), (
+            'Проверьте, что время запросов отдаётся в заголовке Server-Timing'
+        )
+        assert not caplog.records
+
+        monkeypatch.setattr(ReviewViewSet, 'sparse_select_related', ())
+        with caplog.at_level(logging.WARNING, logger='api.middleware'):
+            response = APIClient().get(url + '?limit=5')
+        assert response['X-Query-Count'] == '7'
+        assert len(caplog.records) == 1, (
+            'Проверьте, что повторяющиеся запросы попадают в лог'
+        )
+        message = caplog.records[0].getMessage()
+        assert 'ReviewViewSet' in message and 'ReviewSerializer.author' in message, (
+            'Проверьте, что в предупреждении указаны представление и поле сериализатора'
+        )
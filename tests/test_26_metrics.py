@@ -0,0 +1,63 @@
+import multiprocessing
+
+import pytest
+
+from api.metrics import FileStore
+
+from .common import create_titles
+
+
+def increment(directory):
+    FileStore(directory).inc('forked_total', 2)
+
+
+class Test26Metrics:
+
+    def test_01_file_store_aggregates_processes(self, tmp_path):
+        store = FileStore(str(tmp_path))
+        store.inc('forked_total')
+        for number in range(2000):
+            store.inc(f'grow_total{{n="{number}"}}')
+        process = multiprocessing.get_context('fork').Process(
+            target=increment, args=(str(tmp_path),)
+        )
+        process.start()
+        process.join()
+        values = store.collect()
+        assert values['forked_total'] == 3, (
+            'Проверьте, что метрики разных процессов суммируются'
+        )
+        assert values['grow_total{n="1999"}'] == 1
+        assert len(list(tmp_path.iterdir())) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_metrics_endpoint(self, settings, tmp_path, client, admin_client):
+        settings.METRICS_DIR = str(tmp_path)
+        create_titles(admin_client)
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        response = client.get('/metrics')
+        assert response.status_code == 200, 'Проверьте, что `/metrics` доступен'
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        text = response.content.decode()
+        for line in (
+            '# TYPE api_request_duration_seconds histogram',
+            'api_requests_total{viewset="TitleViewSet",action="list",status="200"} 2.0',
+            'api_requests_total{viewset="TitleViewSet",action="create",status="201"} 2.0',
+            'api_request_duration_seconds_bucket{viewset="TitleViewSet",action="list",le="+Inf"} 2.0',
+            'api_response_size_bytes_count{viewset="TitleViewSet",action="list"} 2.0',
+            'api_cache_requests_total{viewset="TitleViewSet",result="hit"} 1.0',
+            'api_cache_requests_total{viewset="TitleViewSet",result="miss"} 1.0',
+            'api_authentication_duration_seconds_count{source="anonymous"} 2.0',
+        ):
+            assert line in text, f'Проверьте, что в `/metrics` есть строка {line}'
+        assert 'api_db_queries_total{viewset="TitleViewSet",action="list"}' in text
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_metrics_allowed_ips(self, settings, client):
+        assert client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code == 403, (
+            'Проверьте, что `/metrics` недоступен с адресов не из `METRICS_ALLOWED_IPS`'
+        )
+        settings.METRICS_ALLOWED_IPS = ['10.0.0.5']
+        assert client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code == 200
+        assert client.get('/metrics').status_code == 403
@@ -0,0 +1,175 @@
+import asyncio
+import json
+
+import pytest
+
+from .common import create_comments
+
+
+def admin_headers(admin):
+    from api.authentication import get_access_token
+
+    return [(b'authorization', f'Bearer {get_access_token(admin)}'.encode())]
+
+
+def asgi_messages(path, query='', headers=(), send=None):
+    from api_yamdb.asgi import application
+
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def collect(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http', 'method': 'GET', 'scheme': 'http', 'path': path,
+        'query_string': query.encode(), 'server': ('testserver', 80),
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+    asyncio.run(application(scope, receive, send or collect))
+    return messages
+
+
+def call_asgi(path, query='', headers=()):
+    messages = asgi_messages(path, query, headers)
+    body = b''.join(
+        message.get('body', b'') for message in messages[1:]
+    )
+    return (
+        messages[0]['status'],
+        {name.decode(): value.decode() for name, value in messages[0]['headers']},
+        body
+    )
+
+
+class Test27Asgi:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_same_responses(self, client, admin_client, admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        for path, query in (
+            ('/api/v1/titles/', ''),
+            ('/api/v1/titles/', 'limit=1&offset=1'),
+            (f'/api/v1/titles/{title_id}/', ''),
+            (f'/api/v1/titles/{title_id}/reviews/', 'limit=2'),
+            (f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/', ''),
+            ('/api/v1/titles/', 'genre=horror'),
+            ('/api/v1/titles/999/', ''),
+        ):
+            status, _, body = call_asgi(path, query)
+            response = client.get(f'{path}?{query}')
+            assert status == response.status_code
+            assert json.loads(body) == response.json(), (
+                f'Проверьте, что ASGI-приложение отдаёт для {path}?{query} '
+                'тот же ответ, что и WSGI'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_authentication(self, admin_client, admin):
+        create_comments(admin_client, admin)
+        status, _, _ = call_asgi(
+            '/api/v1/titles/', headers=[(b'authorization', b'Bearer invalid')]
+        )
+        assert status == 401, (
+            'Проверьте, что ASGI-приложение проверяет токен так же, как WSGI'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cache_and_etag(self, admin_client, admin):
+        create_comments(admin_client, admin)
+        _, headers, _ = call_asgi('/api/v1/titles/')
+        assert headers['X-Cache'] == 'MISS' and headers['ETag']
+        _, headers, _ = call_asgi('/api/v1/titles/')
+        assert headers['X-Cache'] == 'HIT', (
+            'Проверьте, что ASGI-приложение отдаёт ответы из кэша'
+        )
+        status, _, body = call_asgi(
+            '/api/v1/titles/',
+            headers=[(b'if-none-match', headers['ETag'].encode())]
+        )
+        assert status == 304 and body == b'', (
+            'Проверьте, что ASGI-приложение поддерживает условные запросы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_streaming(self, settings, admin_client, admin):
+        settings.EXPORT_CHUNK_SIZE = 1
+        create_comments(admin_client, admin)
+        messages = asgi_messages(
+            '/api/v1/titles/export/', 'output=ndjson', admin_headers(admin)
+        )
+        assert messages[0]['status'] == 200
+        bodies = messages[1:]
+        assert len(bodies) > 2 and all(
+            message['more_body'] for message in bodies[:-1]
+        ) and not bodies[-1]['more_body'], (
+            'Проверьте, что потоковый ответ отправляется частями, а не целиком'
+        )
+        lines = b''.join(message['body'] for message in bodies).splitlines()
+        assert len(lines) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_client_disconnect(self, settings, monkeypatch, admin_client, admin):
+        from api import asgi_handler
+
+        settings.EXPORT_CHUNK_SIZE = 1
+        create_comments(admin_client, admin)
+        sent = []
+        finished = []
+        run_wsgi = asgi_handler.run_wsgi
+
+        def watched_run_wsgi(*args):
+            try:
+                return run_wsgi(*args)
+            finally:
+                finished.append(True)
+
+        monkeypatch.setattr(asgi_handler, 'run_wsgi', watched_run_wsgi)
+
+        async def send(message):
+            sent.append(message)
+            if len(sent) == 2:
+                raise OSError('клиент отключился')
+
+        with pytest.raises(OSError):
+            asgi_messages(
+                '/api/v1/titles/export/', 'output=ndjson',
+                admin_headers(admin), send=send
+            )
+        assert len(sent) == 2
+        assert finished, (
+            'Проверьте, что после отключения клиента приложение дожидается '
+            'завершения потока с ответом'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_concurrent_queries(self, monkeypatch, admin_client, admin):
+        from api import concurrency
+
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        batches = []
+        gather_queries = concurrency.gather_queries
+
+        async def spy(calls):
+            batches.append(len(calls))
+            return await gather_queries(calls)
+
+        monkeypatch.setattr(concurrency, 'gather_queries', spy)
+        title_id = titles[0]['id']
+        for path, size in (
+            ('/api/v1/titles/', 3),
+            (f'/api/v1/titles/{title_id}/', 2),
+            (f'/api/v1/titles/{title_id}/reviews/', 2),
+            (f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/comments/', 2),
+        ):
+            batches.clear()
+            status, _, body = call_asgi(path, headers=admin_headers(admin))
+            assert status == 200
+            assert json.loads(body) == admin_client.get(path).json()
+            assert batches == [size], (
+                f'Проверьте, что под ASGI независимые запросы {path} '
+                'выполняются одновременно'
+            )
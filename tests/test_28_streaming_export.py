@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from .common import auth_client, create_reviews
+
+
+def read(response):
+    return b''.join(response.streaming_content).decode()
+
+
+class Test28StreamingExport:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_export(self, settings, admin_client, admin,
+                              django_assert_max_num_queries):
+        settings.EXPORT_CHUNK_SIZE = 1
+        _, titles, user, _ = create_reviews(admin_client, admin)
+        expected = sorted(
+            admin_client.get('/api/v1/titles/').json()['results'],
+            key=lambda title: title['id']
+        )
+        with django_assert_max_num_queries(4):
+            response = admin_client.get('/api/v1/titles/export/')
+            content = read(response)
+        assert response.status_code == 200
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся через StreamingHttpResponse'
+        )
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line) for line in content.splitlines()]
+        assert sorted(rows, key=lambda title: title['id']) == expected, (
+            'Проверьте, что NDJSON содержит по одному произведению в строке'
+        )
+
+        response = admin_client.get('/api/v1/titles/export/?output=json&genre=drama')
+        assert response['Content-Type'] == 'application/json'
+        assert json.loads(read(response)) == [
+            title for title in expected if title['id'] == titles[1]['id']
+        ], 'Проверьте, что выгрузка JSON-массивом учитывает фильтры'
+        response = admin_client.get('/api/v1/titles/export/?output=json&genre=unknown')
+        assert json.loads(read(response)) == []
+
+        response = admin_client.get('/api/v1/titles/export/?output=csv')
+        assert response.status_code == 400
+        assert auth_client(user).get('/api/v1/titles/export/').status_code == 403, (
+            'Проверьте, что выгрузка доступна только администратору'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_export(self, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/export/'
+        response = admin_client.get(url + '?fields=id,score')
+        rows = [json.loads(line) for line in read(response).splitlines()]
+        assert sorted(rows, key=lambda review: review['id']) == [
+            {'id': review['id'], 'score': review['score']} for review in reviews
+        ]
+        assert auth_client(user).get(url).status_code == 403